@@ -7,26 +7,29 @@ const copyBtn = document.getElementById('copyBtn');
 const spinner = document.getElementById('spinner');
 const dropZone = document.getElementById('dropZone');
 const recentList = document.getElementById('recentList');
+const recentMoreBtn = document.getElementById('recentMore');
 const dots = [document.getElementById('dot1'), document.getElementById('dot2'), document.getElementById('dot3')];
 
-const RECENT_KEY = 'tiktok_dl_recent';
-const MAX_RECENT = 8;
+const RECENT_PAGE_SIZE = 8;
 
-function getRecent() {
+let recentItems = [];
+let recentPage = 0;
+
+async function loadRecent(reset = true) {
+  const page = reset ? 1 : recentPage + 1;
   try {
-    return JSON.parse(localStorage.getItem(RECENT_KEY) || '[]');
-  } catch {
-    return [];
+    const r = await fetch(`/history?page=${page}&per_page=${RECENT_PAGE_SIZE}`);
+    if (!r.ok) return;
+    const j = await r.json();
+    recentItems = reset ? j.items : recentItems.concat(j.items);
+    recentPage = page;
+    recentMoreBtn.style.display = j.has_more ? 'inline-block' : 'none';
+    renderRecent();
+  } catch (_) {
+    // Keep the current list if history is temporarily unavailable.
   }
 }
 
-function addRecent(url) {
-  const list = getRecent().filter((u) => u !== url);
-  list.unshift(url);
-  localStorage.setItem(RECENT_KEY, JSON.stringify(list.slice(0, MAX_RECENT)));
-  renderRecent();
-}
-
 function esc(s) {
   return String(s)
     .replace(/&/g, '&amp;')
@@ -36,7 +39,7 @@ function esc(s) {
 }
 
 function renderRecent() {
-  const list = getRecent();
+  const list = recentItems.map((item) => item.url);
   if (!list.length) {
     recentList.innerHTML = '<div class="recent-empty">No recent URLs yet.</div>';
     return;
@@ -110,8 +113,8 @@ async function submitUrl() {
       return;
     }
 
-    addRecent(url);
     setStatus('Downloading...', 0);
+    loadRecent();
   } catch (e) {
     setStatus(`Error: ${e.message}`, null);
   } finally {
@@ -146,6 +149,7 @@ async function poll() {
       }
 
       if (hasContent) {
+        if (statusEl.textContent !== 'Completed') loadRecent();
         setStatus('Completed', 2);
       } else if (j.video_url) {
         setStatus('Transcribing...', 1);
@@ -174,5 +178,7 @@ copyBtn.onclick = () => {
   });
 };
 
-renderRecent();
+recentMoreBtn.onclick = () => loadRecent(false);
+
+loadRecent();
 poll();
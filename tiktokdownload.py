@@ -1,19 +1,39 @@
-from flask import Flask, request, jsonify, send_from_directory, render_template, send_file
-from threading import Thread, Lock
-import requests
-import yt_dlp
-from yt_dlp.postprocessor import FFmpegPostProcessor
+import time
+_STARTUP_STARTED = time.perf_counter()  # before any other import, for --startup-profile
+
+import importlib
 import json
 import os
+import queue
+import random
+import re
 import subprocess
 import sys
-import time
 import traceback
+import types
 import shutil
+import socket
+import sqlite3
+from collections import OrderedDict, deque
 from pathlib import Path
 from urllib.parse import urlparse, urlunparse
 import uuid
 import webbrowser
+from threading import Thread, Lock, Condition, Event, local
+
+_startup_timings = [("import stdlib", time.perf_counter() - _STARTUP_STARTED)]
+# Flask pulls in werkzeug and jinja2; load those first so --startup-profile reports each one.
+for _module in ("werkzeug", "jinja2"):
+    _import_started = time.perf_counter()
+    importlib.import_module(_module)
+    _startup_timings.append((f"import {_module}", time.perf_counter() - _import_started))
+_import_started = time.perf_counter()
+from flask import Flask, request, jsonify, send_from_directory, render_template, send_file
+_startup_timings.append(("import flask", time.perf_counter() - _import_started))
+
+# yt_dlp (and whisper) are imported inside the functions that use them: they dominate
+# import time, and the server should answer / before they are loaded.
+_warm_up_done = Event()
 
 # Server configuration
 app = Flask(__name__, static_folder="static", static_url_path="/static")
@@ -24,10 +44,15 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 BASE_DIR = Path(__file__).resolve().parent
 VIDEO_DIR = (BASE_DIR / "static" / "videos").resolve()
 AUDIO_DIR = (BASE_DIR / "static" / "audio").resolve()
+SUBTITLE_DIR = (BASE_DIR / "static" / "subtitles").resolve()
 SETTINGS_FILE = (BASE_DIR / "app_settings.json").resolve()
+ARCHIVE_DB = (BASE_DIR / "transcripts.db").resolve()
+JOURNAL_FILE = (BASE_DIR / "jobs.jsonl").resolve()
+TRANSCRIBE_QUEUE_DB = (BASE_DIR / "transcribe_queue.db").resolve()  # "transcribe_queue" setting or --queue PATH
 RUNTIME_VIDEO_DIR = (BASE_DIR / ".runtime" / "videos").resolve()
 VIDEO_DIR.mkdir(parents=True, exist_ok=True)
 AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+SUBTITLE_DIR.mkdir(parents=True, exist_ok=True)
 RUNTIME_VIDEO_DIR.mkdir(parents=True, exist_ok=True)
 
 # Path to saved mp4 for current job
@@ -37,9 +62,97 @@ video_is_ephemeral = False
 # Set at startup by prompt_transcribe_choice()
 TRANSCRIBE_ENABLED = True
 SAVE_VIDEOS_LOCALLY = True
+WORD_TIMESTAMPS = False  # default for jobs that don't ask; "word_timestamps" in app_settings.json
+
+# Job registry shared by /set_url and /set_urls (guarded by `lock`)
+JOB_QUEUED = "queued"
+JOB_DOWNLOADING = "downloading"
+JOB_TRANSCRIBING = "transcribing"
+JOB_DONE = "done"
+JOB_ERROR = "error"
+JOB_CANCELLED = "cancelled"
+JOB_STATES = (JOB_QUEUED, JOB_DOWNLOADING, JOB_TRANSCRIBING, JOB_DONE, JOB_ERROR, JOB_CANCELLED)
+JOB_FINAL_STATES = (JOB_DONE, JOB_ERROR, JOB_CANCELLED)
+jobs = {}
+batches = {}
+job_queue = queue.Queue()
+
+# Cooperative cancellation: per-job cancel flags and child processes (guarded by `lock`)
+LATEST_WINS = False  # a new /set_url cancels the in-flight one; "latest_wins" setting or --latest-wins
+_cancel_events = {}
+_job_children = {}
+_job_context = local()  # .job_id / .cancel_event of the job running on this thread
+
+# Append-only job journal (JOURNAL_FILE), replayed at startup and compacted periodically
+JOURNAL_COMPACT_INTERVAL = 600  # seconds between compaction checks
+JOURNAL_COMPACT_MIN_LINES = 1000
+JOURNAL_MAX_FINISHED = 2000  # finished jobs kept across compactions (transcripts stay in the archive)
+_journal_lock = Lock()
+_journal_lines = 0
+
+# Distributed transcription: with REMOTE_TRANSCRIPTION on ("remote_transcription" setting or
+# --remote-transcription) the server only downloads and enqueues; `--worker` processes, here or on
+# another machine sharing TRANSCRIBE_QUEUE_DB, lease jobs, heartbeat while transcribing and push results back.
+REMOTE_TRANSCRIPTION = False
+TRANSCRIBE_LEASE_SECONDS = 60  # a worker that stops heartbeating for this long loses its job
+TRANSCRIBE_HEARTBEAT_SECONDS = 15
+TRANSCRIBE_MAX_ATTEMPTS = 3  # leases that may expire before the job is failed instead of requeued
+TRANSCRIBE_POLL_INTERVAL = 2  # seconds between queue polls (workers and the result collector)
+
+# Batch submissions: MAX_PARALLEL_DOWNLOADS is overridden by "max_parallel_downloads" in
+# app_settings.json or --parallel N; MAX_BATCH_URLS is fixed
+MAX_BATCH_URLS = 500
+MAX_PARALLEL_DOWNLOADS = 2
+# With save-videos-locally off, batch jobs also download into RUNTIME_VIDEO_DIR; delete them after this long
+RUNTIME_VIDEO_TTL = 3600
+RUNTIME_VIDEO_SWEEP_INTERVAL = 300
+
+# Per-platform download scheduling: concurrency caps, token-bucket rate limits and
+# yt-dlp retry tuning. Overridable via "platform_limits" in app_settings.json.
+PLATFORM_LIMITS = {
+    "tiktok": {"max_concurrent": 2, "requests_per_minute": 20, "burst": 3,
+               "fragment_concurrency": 4, "retries": 10, "fragment_retries": 20},
+    "instagram": {"max_concurrent": 1, "requests_per_minute": 8, "burst": 2,
+                  "fragment_concurrency": 2, "retries": 5, "fragment_retries": 10},
+    "youtube": {"max_concurrent": 2, "requests_per_minute": 30, "burst": 4,
+                "fragment_concurrency": 8, "retries": 10, "fragment_retries": 20},
+    "x": {"max_concurrent": 2, "requests_per_minute": 15, "burst": 3,
+          "fragment_concurrency": 4, "retries": 10, "fragment_retries": 20},
+    "other": {"max_concurrent": 2, "requests_per_minute": 30, "burst": 4,
+              "fragment_concurrency": 8, "retries": 10, "fragment_retries": 20},
+}
+THROTTLE_BACKOFF_BASE = 15  # seconds, doubled per consecutive 429/403 on the same host
+THROTTLE_BACKOFF_MAX = 600
+THROTTLE_RETRIES = 3  # re-attempts of a throttled download before the job fails
+_scheduler_cond = Condition()
+_host_state = {}
+_throttle_events = deque(maxlen=50)
+
+# Adaptive Whisper model choice: per job, the most accurate model whose estimated time to clear the
+# backlog (audio duration x seconds-per-audio-second x jobs waiting) fits TARGET_LATENCY_SECONDS.
+# "whisper_models", "target_latency_seconds" (or --target-latency N) and "whisper_model" (pin one
+# model) in app_settings.json.
+WHISPER_MODELS = ["tiny", "base", "small"]  # fastest first
+WHISPER_MODEL = ""  # pinned model, bypasses the policy
+TARGET_LATENCY_SECONDS = 120
+WHISPER_MODEL_CACHE_SIZE = 2
+# CPU seconds per second of audio: rough starting points, replaced by measurements as jobs finish
+_model_speed = {"tiny": 0.08, "base": 0.15, "small": 0.5}
+
+# Shared lazily-initialised resources (ffmpeg discovery, Whisper models)
+_ffmpeg_bin = None
+_ffmpeg_lock = Lock()
+_settings_lock = Lock()
+_whisper_models = OrderedDict()  # name -> loaded model, least recently used first
+_model_lock = Lock()
 
 _ORIGINAL_POPEN = subprocess.Popen
 _NO_WINDOW_PATCHED = False
+_CHILD_TRACKING_PATCHED = False
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's thread once the job has been asked to stop."""
 
 
 def _enable_no_window_subprocesses():
@@ -52,7 +165,9 @@ def _enable_no_window_subprocesses():
     startf_use_showwindow = getattr(subprocess, "STARTF_USESHOWWINDOW", 0)
     sw_hide = getattr(subprocess, "SW_HIDE", 0)
 
-    def _popen_hidden(*args, **kwargs):
+    previous_init = _ORIGINAL_POPEN.__init__
+
+    def _popen_init_hidden(self, *args, **kwargs):
         flags = kwargs.get("creationflags", 0) or 0
         kwargs["creationflags"] = flags | create_no_window
 
@@ -63,12 +178,68 @@ def _enable_no_window_subprocesses():
         startupinfo.wShowWindow = sw_hide
         kwargs["startupinfo"] = startupinfo
 
-        return _ORIGINAL_POPEN(*args, **kwargs)
+        previous_init(self, *args, **kwargs)
 
-    subprocess.Popen = _popen_hidden
+    # Patch __init__ rather than replacing subprocess.Popen with a function: yt-dlp (imported
+    # lazily, after this runs) subclasses subprocess.Popen, which must stay a class.
+    _ORIGINAL_POPEN.__init__ = _popen_init_hidden
     _NO_WINDOW_PATCHED = True
 
 
+def _enable_child_process_tracking():
+    """Record child processes (ffmpeg from yt-dlp or GIF conversion) per job so cancel can kill them."""
+    global _CHILD_TRACKING_PATCHED
+    if _CHILD_TRACKING_PATCHED:
+        return
+
+    previous_init = _ORIGINAL_POPEN.__init__
+
+    def _popen_init_tracked(self, *args, **kwargs):
+        previous_init(self, *args, **kwargs)
+        job_id = getattr(_job_context, "job_id", None)
+        if not job_id:
+            return
+        with lock:
+            _job_children.setdefault(job_id, []).append(self)
+            cancelled = _cancel_events[job_id].is_set() if job_id in _cancel_events else False
+        if cancelled:
+            self.kill()
+
+    # Patch __init__ (not the module attribute) so subclasses such as yt-dlp's Popen are covered too.
+    _ORIGINAL_POPEN.__init__ = _popen_init_tracked
+    _CHILD_TRACKING_PATCHED = True
+
+
+def _raise_if_cancelled():
+    """Cancellation checkpoint for code running inside a job's thread."""
+    event = getattr(_job_context, "cancel_event", None)
+    if event is not None and event.is_set():
+        raise JobCancelled()
+
+
+class _CancellableProgress:
+    """Stand-in for whisper's (disabled) tqdm bar: update() runs once per decoded 30s window."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, n=1):
+        _raise_if_cancelled()
+
+
+def _install_whisper_cancel_hook():
+    """Let transcriptions stop between windows: whisper.transcribe exposes no callback of its own."""
+    module = sys.modules.get("whisper.transcribe")
+    if module is not None and hasattr(module, "tqdm"):
+        module.tqdm = types.SimpleNamespace(tqdm=_CancellableProgress)
+
+
 def _is_path_inside(path, parent):
     """Return True when path is inside parent."""
     try:
@@ -93,6 +264,31 @@ def _delete_runtime_video_if_any():
     video_is_ephemeral = False
 
 
+def sweep_runtime_videos():
+    """Delete runtime-only videos older than RUNTIME_VIDEO_TTL, except the current /set_url video
+    and files of jobs still in progress."""
+    cutoff = time.time() - RUNTIME_VIDEO_TTL
+    with lock:
+        current = Path(video_path).resolve() if video_path else None
+        active = {j["id"] for j in jobs.values() if j["status"] not in JOB_FINAL_STATES}
+    for path in RUNTIME_VIDEO_DIR.iterdir():
+        try:
+            if (not path.is_file() or path.resolve() == current or path.name.split(".")[0] in active
+                    or path.stat().st_mtime > cutoff):
+                continue
+            path.unlink()
+            print(f"[+] Removed temporary video: {path}")
+        except OSError:
+            pass
+
+
+def runtime_video_sweeper():
+    """Periodically run sweep_runtime_videos() so unsaved batch downloads don't pile up."""
+    while True:
+        sweep_runtime_videos()
+        time.sleep(RUNTIME_VIDEO_SWEEP_INTERVAL)
+
+
 def load_app_settings():
     """Load persisted app settings."""
     settings = {}
@@ -107,16 +303,24 @@ def load_app_settings():
     return settings
 
 
+def persist_app_settings(**updates):
+    """Merge updates into the persisted app settings."""
+    # Read-modify-write from several threads (warm-up, tray toggle): serialise it so no update is lost.
+    with _settings_lock:
+        payload = load_app_settings()
+        payload.update(updates)
+        try:
+            SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp = SETTINGS_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8")
+            os.replace(tmp, SETTINGS_FILE)
+        except Exception as e:
+            print(f"[!] Failed to persist settings to {SETTINGS_FILE}: {e}")
+
+
 def persist_save_videos_setting(enabled):
     """Persist save-videos-locally preference."""
-    payload = {"save_videos_locally": bool(enabled)}
-    try:
-        SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        tmp = SETTINGS_FILE.with_suffix(".tmp")
-        tmp.write_text(json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8")
-        os.replace(tmp, SETTINGS_FILE)
-    except Exception as e:
-        print(f"[!] Failed to persist settings to {SETTINGS_FILE}: {e}")
+    persist_app_settings(save_videos_locally=bool(enabled))
 
 
 def _prompt_choice(title, options):
@@ -181,6 +385,29 @@ def _parse_cli_args():
     return transcribe
 
 
+def _parse_cli_value(flag):
+    """Return the value following flag (e.g. --queue PATH or --queue=PATH), or None."""
+    args = sys.argv[1:]
+    for i, a in enumerate(args):
+        if a == flag and i + 1 < len(args):
+            return args[i + 1]
+        if a.startswith(f"{flag}="):
+            return a.split("=", 1)[1]
+    return None
+
+
+def _parse_cli_int(flag):
+    """Return the int value following flag (e.g. --parallel 4), or None."""
+    value = _parse_cli_value(flag)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"[!] Ignoring non-integer value for {flag}: {value!r}")
+        return None
+
+
 def _relaunch_headless_without_console(transcribe_enabled):
     """On Windows, re-exec with pythonw.exe (no console) then exit. Returns True if we did."""
     if sys.platform != "win32":
@@ -193,6 +420,7 @@ def _relaunch_headless_without_console(transcribe_enabled):
         return False
     script = Path(__file__).resolve()
     args = [str(pythonw), str(script), "--transcribe" if transcribe_enabled else "--no-transcribe"]
+    args += [a for a in sys.argv[1:] if a not in ("--transcribe", "--no-transcribe")]
     try:
         subprocess.Popen(args, cwd=script.parent, creationflags=subprocess.CREATE_NO_WINDOW)
         return True
@@ -370,6 +598,524 @@ def is_likely_x_gif(ydl, url):
         return False
 
 
+def platform_for_url(url):
+    """Scheduling bucket for a URL: tiktok, instagram, youtube, x or other."""
+    if is_youtube_url(url):
+        return "youtube"
+    if is_x_url(url):
+        return "x"
+    host = (urlparse((url or "").strip().lower()).netloc or "").split(":")[0]
+    if "tiktok" in host:
+        return "tiktok"
+    if "instagram" in host:
+        return "instagram"
+    return "other"
+
+
+def apply_platform_limit_overrides(overrides):
+    """Merge {"tiktok": {"max_concurrent": 1, ...}, ...} from settings into PLATFORM_LIMITS."""
+    if not isinstance(overrides, dict):
+        return
+    for platform, values in overrides.items():
+        if platform not in PLATFORM_LIMITS or not isinstance(values, dict):
+            print(f"[!] Ignoring platform_limits entry: {platform!r}")
+            continue
+        for name, value in values.items():
+            if name in PLATFORM_LIMITS[platform] and isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+                PLATFORM_LIMITS[platform][name] = value
+
+
+def _host_limits(platform):
+    return PLATFORM_LIMITS.get(platform) or PLATFORM_LIMITS["other"]
+
+
+def _get_host_state(platform):
+    """Scheduler state for platform. Caller must hold `_scheduler_cond`."""
+    state = _host_state.get(platform)
+    if state is None:
+        state = {
+            "in_flight": 0,
+            "tokens": float(_host_limits(platform)["burst"]),
+            "refilled_at": time.monotonic(),
+            "backoff_level": 0,
+            "backoff_until": 0.0,
+            "throttle_count": 0,
+        }
+        _host_state[platform] = state
+    return state
+
+
+def _refill_tokens(state, limits, now):
+    """Token bucket refill; requests_per_minute <= 0 means unlimited."""
+    burst = float(max(1, limits["burst"]))
+    rate = limits["requests_per_minute"] / 60.0
+    if rate <= 0:
+        state["tokens"] = burst
+    else:
+        state["tokens"] = min(burst, state["tokens"] + (now - state["refilled_at"]) * rate)
+    state["refilled_at"] = now
+
+
+def acquire_download_slot(platform):
+    """Block until platform has a free slot, a rate-limit token, and no active backoff."""
+    limits = _host_limits(platform)
+    with _scheduler_cond:
+        while True:
+            _raise_if_cancelled()
+            state = _get_host_state(platform)
+            now = time.monotonic()
+            _refill_tokens(state, limits, now)
+            if now < state["backoff_until"]:
+                wait = state["backoff_until"] - now
+            elif state["in_flight"] >= max(1, limits["max_concurrent"]):
+                wait = None  # woken by release_download_slot()
+            elif state["tokens"] < 1:
+                wait = (1 - state["tokens"]) * 60.0 / limits["requests_per_minute"]
+            else:
+                state["tokens"] -= 1
+                state["in_flight"] += 1
+                return
+            _scheduler_cond.wait(timeout=wait)
+
+
+def release_download_slot(platform):
+    with _scheduler_cond:
+        state = _get_host_state(platform)
+        state["in_flight"] = max(0, state["in_flight"] - 1)
+        _scheduler_cond.notify_all()
+
+
+def record_download_success(platform):
+    """Relax the shared backoff one step after a clean download."""
+    with _scheduler_cond:
+        state = _get_host_state(platform)
+        state["backoff_level"] = max(0, state["backoff_level"] - 1)
+
+
+def record_throttle(platform, reason):
+    """Start (or extend) an exponential backoff shared by every job on platform. Returns delay seconds."""
+    with _scheduler_cond:
+        state = _get_host_state(platform)
+        state["backoff_level"] = min(state["backoff_level"] + 1, 10)
+        delay = min(THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_BASE * 2 ** (state["backoff_level"] - 1))
+        delay *= random.uniform(0.8, 1.2)  # jitter so parallel jobs don't retry in lockstep
+        state["backoff_until"] = max(state["backoff_until"], time.monotonic() + delay)
+        state["throttle_count"] += 1
+        _throttle_events.append({
+            "platform": platform,
+            "reason": reason,
+            "backoff_seconds": round(delay, 1),
+            "at": time.time(),
+        })
+        _scheduler_cond.notify_all()
+    print(f"[!] {platform} throttled ({reason}); backing off {delay:.0f}s for all {platform} jobs")
+    return delay
+
+
+def throttle_reason(error):
+    """Return "HTTP 429"/"HTTP 403" when a download error looks like rate limiting, else None."""
+    msg = str(error).lower()
+    if re.search(r"\b429\b|too many requests|rate.?limit", msg):
+        return "HTTP 429"
+    if re.search(r"\b403\b|forbidden", msg):
+        return "HTTP 403"
+    return None
+
+
+def scheduler_status():
+    """Per-platform in-flight counts/backoff plus recent throttle events."""
+    with _scheduler_cond:
+        now = time.monotonic()
+        hosts = {}
+        for platform, limits in PLATFORM_LIMITS.items():
+            state = _get_host_state(platform)
+            _refill_tokens(state, limits, now)
+            hosts[platform] = {
+                "in_flight": state["in_flight"],
+                "max_concurrent": limits["max_concurrent"],
+                "tokens": round(state["tokens"], 2),
+                "backoff_seconds_remaining": round(max(0.0, state["backoff_until"] - now), 1),
+                "throttle_count": state["throttle_count"],
+            }
+        events = list(_throttle_events)
+    return hosts, events
+
+
+_ARCHIVE_SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    duration REAL,
+    text TEXT NOT NULL,
+    segments TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_created_at ON transcripts(created_at);
+CREATE INDEX IF NOT EXISTS transcripts_dedup_key ON transcripts(dedup_key);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    text, url, content='transcripts', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, text, url) VALUES (new.id, new.text, new.url);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text, url) VALUES ('delete', old.id, old.text, old.url);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_au AFTER UPDATE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text, url) VALUES ('delete', old.id, old.text, old.url);
+    INSERT INTO transcripts_fts(rowid, text, url) VALUES (new.id, new.text, new.url);
+END;
+"""
+_archive_ready = False
+_archive_init_lock = Lock()
+
+
+def _archive_connect():
+    """Open a connection to the transcript archive, creating the schema on first use."""
+    global _archive_ready
+    conn = sqlite3.connect(str(ARCHIVE_DB), timeout=10)
+    conn.row_factory = sqlite3.Row
+    if not _archive_ready:
+        with _archive_init_lock:
+            if not _archive_ready:
+                conn.executescript(_ARCHIVE_SCHEMA)
+                _archive_ready = True
+    return conn
+
+
+def archive_transcript(job, text, segments):
+    """Store a finished job (text may be empty in download-only mode) in the archive."""
+    duration = max((s["end"] for s in segments), default=None)
+    conn = _archive_connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO transcripts (job_id, url, dedup_key, platform, created_at, duration, text, segments) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET duration = excluded.duration, text = excluded.text, "
+                "segments = excluded.segments",
+                (
+                    job["id"],
+                    job["url"],
+                    job["key"],
+                    platform_for_url(job["url"]),
+                    job["created_at"],
+                    duration,
+                    "" if text == "..." else text,
+                    json.dumps(segments, ensure_ascii=False),
+                ),
+            )
+    finally:
+        conn.close()
+
+
+def archive_submissions(submitted):
+    """Record newly submitted jobs with an empty transcript, so /history also lists videos
+    that later fail or are cancelled (archive_transcript fills the row in on success)."""
+    conn = _archive_connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO transcripts (job_id, url, dedup_key, platform, created_at, duration, "
+                "text, segments) VALUES (?, ?, ?, ?, ?, NULL, '', '[]')",
+                [(j["id"], j["url"], j["key"], platform_for_url(j["url"]), j["created_at"]) for j in submitted],
+            )
+    finally:
+        conn.close()
+
+
+def _fts_query(q):
+    """Turn free text into a safe FTS5 query: all words must match, last one as a prefix."""
+    terms = re.findall(r"\w+", q or "")
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_transcripts(q, limit=20, offset=0):
+    """Ranked (bm25) matches with highlighted snippets. Returns (results, has_more)."""
+    match = _fts_query(q)
+    if not match:
+        return [], False
+    conn = _archive_connect()
+    try:
+        rows = conn.execute(
+            "SELECT t.job_id, t.url, t.platform, t.created_at, t.duration, "
+            "snippet(transcripts_fts, 0, '[', ']', '…', 16) AS snippet, bm25(transcripts_fts) AS score "
+            "FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid "
+            "WHERE transcripts_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+            (match, limit + 1, offset),
+        ).fetchall()
+    finally:
+        conn.close()
+    results = [dict(r) for r in rows[:limit]]
+    for r in results:
+        r["score"] = round(-r["score"], 3)  # bm25() is lower-is-better; flip for readability
+    return results, len(rows) > limit
+
+
+def transcript_history(page=1, per_page=20):
+    """Most recent distinct videos (newest job per dedup key). Returns (items, total)."""
+    conn = _archive_connect()
+    try:
+        total = conn.execute("SELECT COUNT(DISTINCT dedup_key) FROM transcripts").fetchone()[0]
+        # SQLite returns the other columns from the row holding MAX(created_at).
+        rows = conn.execute(
+            "SELECT job_id, url, platform, MAX(created_at) AS created_at, duration, text != '' AS has_transcript "
+            "FROM transcripts GROUP BY dedup_key ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (per_page, (page - 1) * per_page),
+        ).fetchall()
+    finally:
+        conn.close()
+    items = [dict(r) for r in rows]
+    for item in items:
+        item["has_transcript"] = bool(item["has_transcript"])
+    return items, total
+
+
+def archived_segments(job_id):
+    """Segments stored for job_id in the archive, or None if the job was never archived."""
+    conn = _archive_connect()
+    try:
+        row = conn.execute("SELECT segments FROM transcripts WHERE job_id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row["segments"]) if row else None
+
+
+# No WAL here: the queue file may sit on a network share, where WAL's shared memory doesn't work.
+_QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcribe_queue (
+    job_id TEXT PRIMARY KEY,
+    media_path TEXT NOT NULL,
+    word_timestamps INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    text TEXT,
+    segments TEXT,
+    model TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS transcribe_queue_state ON transcribe_queue(state, enqueued_at);
+"""
+_queue_ready = False
+_queue_init_lock = Lock()
+
+
+def _queue_connect():
+    """Open an autocommit connection to the transcription queue, creating the schema on first use."""
+    global _queue_ready
+    conn = sqlite3.connect(str(TRANSCRIBE_QUEUE_DB), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if not _queue_ready:
+        with _queue_init_lock:
+            if not _queue_ready:
+                conn.executescript(_QUEUE_SCHEMA)
+                columns = {r["name"] for r in conn.execute("PRAGMA table_info(transcribe_queue)")}
+                if "model" not in columns:  # queue created before adaptive model selection
+                    conn.execute("ALTER TABLE transcribe_queue ADD COLUMN model TEXT")
+                _queue_ready = True
+    return conn
+
+
+def enqueue_transcription(job_id, media_path, word_timestamps):
+    """Hand a downloaded job to the --worker processes. A row already queued or finished is kept."""
+    media = Path(media_path).resolve()
+    try:
+        # Relative to BASE_DIR so a worker on another machine can resolve it against --media-root.
+        stored_path = media.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        stored_path = str(media)
+    conn = _queue_connect()
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO transcribe_queue (job_id, media_path, word_timestamps, enqueued_at) "
+            "VALUES (?, ?, ?, ?)",
+            (job_id, stored_path, int(bool(word_timestamps)), time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def lease_transcription(worker_name):
+    """Claim the oldest pending job, or one whose worker stopped heartbeating. Returns a dict or None."""
+    now = time.time()
+    conn = _queue_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE transcribe_queue SET state = 'failed', finished_at = ?, error = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, f"Transcription worker stopped responding ({TRANSCRIBE_MAX_ATTEMPTS} attempts)",
+                 now, TRANSCRIBE_MAX_ATTEMPTS),
+            )
+            row = conn.execute(
+                "SELECT * FROM transcribe_queue WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE transcribe_queue SET state = 'leased', worker = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE job_id = ?",
+                    (worker_name, now + TRANSCRIBE_LEASE_SECONDS, row["job_id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    if row["state"] == "leased":
+        print(f"[!] Requeued job {row['job_id']}: lease held by {row['worker']} expired")
+    return dict(row)
+
+
+def renew_transcription_lease(job_id, worker_name):
+    """Heartbeat. Returns False once the job is no longer this worker's (cancelled or re-leased)."""
+    conn = _queue_connect()
+    try:
+        cur = conn.execute(
+            "UPDATE transcribe_queue SET lease_expires = ? WHERE job_id = ? AND state = 'leased' AND worker = ?",
+            (time.time() + TRANSCRIBE_LEASE_SECONDS, job_id, worker_name),
+        )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def finish_transcription(job_id, worker_name, text="", segments=None, model=None, error=None, release=False):
+    """Push a worker's result (or error) back; release=True returns the job to the queue instead."""
+    conn = _queue_connect()
+    try:
+        if release:
+            cur = conn.execute(
+                "UPDATE transcribe_queue SET state = 'pending', worker = NULL, lease_expires = NULL, "
+                "attempts = attempts - 1 WHERE job_id = ? AND state = 'leased' AND worker = ?",
+                (job_id, worker_name),
+            )
+        else:
+            cur = conn.execute(
+                "UPDATE transcribe_queue SET state = ?, finished_at = ?, text = ?, segments = ?, model = ?, "
+                "error = ?, lease_expires = NULL WHERE job_id = ? AND state = 'leased' AND worker = ?",
+                ("failed" if error else "done", time.time(), text,
+                 json.dumps(segments or [], ensure_ascii=False), model, error, job_id, worker_name),
+            )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def finished_transcriptions():
+    """Rows the workers have finished (done or failed), oldest first."""
+    conn = _queue_connect()
+    try:
+        rows = conn.execute(
+            "SELECT job_id, state, text, segments, model, error, worker FROM transcribe_queue "
+            "WHERE state IN ('done', 'failed') ORDER BY finished_at"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(r) for r in rows]
+
+
+def drop_transcription(job_id):
+    """Remove a job from the queue (collected or cancelled); a worker holding it stops at its next heartbeat."""
+    conn = _queue_connect()
+    try:
+        conn.execute("DELETE FROM transcribe_queue WHERE job_id = ?", (job_id,))
+    finally:
+        conn.close()
+
+
+def transcription_queue_status():
+    """Pending/leased counts and the workers currently holding a live lease, for /status."""
+    conn = _queue_connect()
+    try:
+        counts = dict(conn.execute("SELECT state, COUNT(*) FROM transcribe_queue GROUP BY state").fetchall())
+        workers = [r[0] for r in conn.execute(
+            "SELECT DISTINCT worker FROM transcribe_queue WHERE state = 'leased' AND lease_expires >= ?",
+            (time.time(),),
+        ).fetchall()]
+    finally:
+        conn.close()
+    return {
+        "pending": counts.get("pending", 0),
+        "leased": counts.get("leased", 0),
+        "finished": counts.get("done", 0) + counts.get("failed", 0),
+        "active_workers": workers,
+    }
+
+
+SUBTITLE_FORMATS = {
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "json": "application/json",
+}
+
+
+def _subtitle_timestamp(seconds, decimal_sep):
+    """HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (VTT)."""
+    ms = int(round(max(0.0, seconds) * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_sep}{ms:03d}"
+
+
+def segments_to_srt(segments):
+    cues = []
+    for i, seg in enumerate(segments, start=1):
+        start = _subtitle_timestamp(seg["start"], ",")
+        end = _subtitle_timestamp(seg["end"], ",")
+        cues.append(f"{i}\n{start} --> {end}\n{seg['text']}\n")
+    return "\n".join(cues)
+
+
+def segments_to_vtt(segments):
+    """WebVTT; with word timestamps, cues carry inline <HH:MM:SS.mmm> karaoke tags."""
+    cues = ["WEBVTT\n"]
+    for seg in segments:
+        start = _subtitle_timestamp(seg["start"], ".")
+        end = _subtitle_timestamp(seg["end"], ".")
+        words = seg.get("words")
+        if words:
+            text = words[0]["word"] + "".join(
+                f" <{_subtitle_timestamp(w['start'], '.')}>{w['word']}" for w in words[1:]
+            )
+        else:
+            text = seg["text"]
+        cues.append(f"{start} --> {end}\n{text}\n")
+    return "\n".join(cues)
+
+
+def write_subtitle_files(job_id, segments):
+    """Render every subtitle format once, so later requests are plain file reads."""
+    renderers = {
+        "srt": segments_to_srt,
+        "vtt": segments_to_vtt,
+        "json": lambda segs: json.dumps({"segments": segs}, ensure_ascii=False, indent=2),
+    }
+    for fmt, render in renderers.items():
+        dest = SUBTITLE_DIR / f"{job_id}.{fmt}"
+        tmp = dest.with_suffix(f".{fmt}.tmp")
+        tmp.write_text(render(segments), encoding="utf-8")
+        os.replace(tmp, dest)
+
+
 ASSETS_DIR = BASE_DIR / "assets"
 
 
@@ -385,6 +1131,305 @@ def index():
     return render_template('index.html')
 
 
+def _new_job(url, save_mode, batch_id=None, word_timestamps=False):
+    """Register a queued job and return it. Caller must hold `lock`."""
+    now = time.time()
+    job = {
+        "id": uuid.uuid4().hex,
+        "url": url,
+        "key": normalize_url_for_dedup(url),
+        "save_videos_locally": bool(save_mode),
+        "word_timestamps": bool(word_timestamps),
+        "batch_id": batch_id,
+        "status": JOB_QUEUED,
+        "video_path": None,
+        "audio_path": None,
+        "transcription": "",
+        "has_subtitles": False,
+        "remote_transcription": False,
+        "whisper_model": "",
+        "cancel_requested": False,
+        "error": "",
+        "created_at": now,
+        "updated_at": now,
+    }
+    jobs[job["id"]] = job
+    _cancel_events[job["id"]] = Event()
+    return job
+
+
+def _update_job(job_id, **fields):
+    """Update (and journal) fields of a registered job. Returns a snapshot, or None if unknown."""
+    with lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return None
+        if not fields:
+            return dict(job)
+        job.update(fields)
+        job["updated_at"] = time.time()
+        snapshot = dict(job)
+    _journal_append({"op": "job", "job": snapshot})
+    return snapshot
+
+
+def _journal_append(*records):
+    """Append records to the job journal with a single write + fsync."""
+    global _journal_lines
+    payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    with _journal_lock:
+        try:
+            with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            _journal_lines += len(records)
+        except OSError as e:
+            print(f"[!] Failed to write job journal {JOURNAL_FILE}: {e}")
+
+
+def compact_journal():
+    """Rewrite the journal as one line per job, dropping the oldest finished jobs past JOURNAL_MAX_FINISHED."""
+    global _journal_lines
+    with lock:
+        finished = sorted(
+            (j for j in jobs.values() if j["status"] in JOB_FINAL_STATES), key=lambda j: j["updated_at"]
+        )
+        dropped = {j["id"] for j in finished[:max(0, len(finished) - JOURNAL_MAX_FINISHED)]}
+        records = [{"op": "job", "job": dict(j)} for j in jobs.values() if j["id"] not in dropped]
+        records += [{"op": "batch", "batch": dict(b)} for b in batches.values()]
+        records.append({"op": "current", "job_id": data.get("job_id", "")})
+        # Take the journal lock before releasing `lock` so no later update lands in the old file.
+        _journal_lock.acquire()
+    try:
+        tmp = JOURNAL_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, JOURNAL_FILE)
+        _journal_lines = len(records)
+    except OSError as e:
+        print(f"[!] Failed to compact job journal {JOURNAL_FILE}: {e}")
+    finally:
+        _journal_lock.release()
+
+
+def replay_journal():
+    """Restore jobs, batches and the current /set_url job after a restart, and requeue unfinished jobs.
+
+    Call before the workers start. Finished results are served again right away; unfinished
+    jobs resume from their last completed stage (see _run_job)."""
+    global video_path, video_is_ephemeral
+    if not JOURNAL_FILE.exists():
+        return
+    restored = {}
+    restored_batches = {}
+    current_id = ""
+    try:
+        with open(JOURNAL_FILE, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+                op = record.get("op")
+                if op == "job":
+                    job = record["job"]
+                    previous = restored.get(job["id"])
+                    if previous is None or job["updated_at"] >= previous["updated_at"]:
+                        restored[job["id"]] = job
+                elif op == "batch":
+                    restored_batches[record["batch"]["id"]] = record["batch"]
+                elif op == "current":
+                    current_id = record.get("job_id", "")
+    except (OSError, KeyError, TypeError) as e:
+        print(f"[!] Failed to read job journal {JOURNAL_FILE}: {e}")
+        return
+
+    resumed = []
+    dropped = []
+    batch_job_ids = {j for b in restored_batches.values() for j in b["job_ids"]}
+    with lock:
+        for job in sorted(restored.values(), key=lambda j: j["created_at"]):
+            if job["status"] not in JOB_FINAL_STATES:
+                # Cancel was requested but hadn't taken effect, or a /set_url job the user already replaced
+                superseded = job["batch_id"] is None and job["id"] != current_id and job["id"] not in batch_job_ids
+                if job.get("cancel_requested") or superseded:
+                    job["status"] = JOB_CANCELLED
+                    if not (job["video_path"] or job["audio_path"]):
+                        dropped.append(job["id"])  # download never finished
+                else:
+                    job["status"] = JOB_QUEUED
+                    resumed.append(job["id"])
+            jobs[job["id"]] = job
+            _cancel_events[job["id"]] = Event()
+        batches.update(restored_batches)
+        current = jobs.get(current_id)
+        if current:
+            data["url"] = current["url"]
+            data["job_id"] = current_id
+            data["save_videos_locally"] = current["save_videos_locally"]
+            if current["status"] == JOB_DONE:
+                data["transcription"] = current["transcription"] or current["url"]
+            elif current["status"] in (JOB_ERROR, JOB_CANCELLED):
+                data["transcription"] = "..."
+            path = current.get("video_path")
+            if path and os.path.exists(path):
+                video_path = path
+                video_is_ephemeral = _is_path_inside(path, RUNTIME_VIDEO_DIR)
+
+    for job_id in dropped:
+        _remove_job_files(job_id)
+    # The /set_url worker picks up the current job itself; everything else goes to the batch pool.
+    for job_id in resumed:
+        if job_id != current_id:
+            job_queue.put(job_id)
+    print(f"[+] Job journal: restored {len(restored)} jobs, resuming {len(resumed)}, "
+          f"cancelled {sum(1 for j in restored.values() if j['status'] == JOB_CANCELLED)}")
+    compact_journal()
+
+
+def journal_compactor():
+    """Periodically compact the journal once it has grown well past one line per job."""
+    while True:
+        time.sleep(JOURNAL_COMPACT_INTERVAL)
+        with lock:
+            live_jobs = len(jobs)
+        if _journal_lines > max(JOURNAL_COMPACT_MIN_LINES, 2 * live_jobs):
+            compact_journal()
+
+
+def cancel_job(job_id):
+    """Ask a job to stop. Queued jobs never start; running ones stop at the next checkpoint
+    and their child processes are killed. Returns a snapshot, or None if unknown."""
+    with lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return None
+        if job["status"] in JOB_FINAL_STATES:
+            return dict(job)
+        _cancel_events.setdefault(job_id, Event()).set()
+        job["cancel_requested"] = True  # journaled, so a restart doesn't resume it
+        # A job waiting on the transcription workers has no thread of its own here to notice the flag.
+        remote = job["status"] == JOB_TRANSCRIBING and job.get("remote_transcription", False)
+        if job["status"] == JOB_QUEUED or remote:
+            job["status"] = JOB_CANCELLED
+            job["updated_at"] = time.time()
+            # No _run_job will reach its cancel path for this job, so publish the result here.
+            if _is_current_job(job_id) and not data.get("transcription"):
+                data["transcription"] = "..."
+        children = list(_job_children.get(job_id, []))
+        snapshot = dict(job)
+    _journal_append({"op": "job", "job": snapshot})
+    if remote:
+        try:
+            drop_transcription(job_id)
+        except sqlite3.Error as e:
+            print(f"[!] Failed to remove job {job_id} from {TRANSCRIBE_QUEUE_DB}: {e}")
+    for proc in children:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+    with _scheduler_cond:
+        _scheduler_cond.notify_all()  # wake it if it is waiting for a download slot
+    print(f"[+] Cancel requested: {snapshot['url']}")
+    return snapshot
+
+
+def _remove_job_files(job_id):
+    """Delete everything a cancelled job left behind (partial downloads, audio, subtitles)."""
+    for folder in (VIDEO_DIR, RUNTIME_VIDEO_DIR, AUDIO_DIR, SUBTITLE_DIR):
+        for path in folder.glob(f"{job_id}.*"):
+            try:
+                path.unlink()
+                print(f"[+] Removed partial file: {path}")
+            except OSError:
+                pass
+
+
+def _is_current_job(job_id):
+    """True when job_id is the job behind /get_transcription. Caller must hold `lock`."""
+    return bool(job_id) and data.get("job_id") == job_id
+
+
+def _request_base_url():
+    return request.host_url[:-1] if request.host_url.endswith("/") else request.host_url
+
+
+def _media_url(path, base, fallback_route):
+    """Public URL for a downloaded media file, or "" if it does not exist."""
+    if not path or not os.path.exists(path):
+        return ""
+    if _is_path_inside(path, VIDEO_DIR):
+        rel = Path(path).resolve().relative_to(BASE_DIR).as_posix()
+        return f"{base}/{rel}"
+    if _is_path_inside(path, RUNTIME_VIDEO_DIR):
+        return f"{base}/runtime_videos/{Path(path).name}"
+    return f"{base}{fallback_route}"
+
+
+def _job_summary(job, base):
+    """JSON-safe view of a job for API responses."""
+    return {
+        "id": job["id"],
+        "url": job["url"],
+        "status": job["status"],
+        "batch_id": job.get("batch_id"),
+        "transcription": job.get("transcription", ""),
+        "whisper_model": job.get("whisper_model", ""),
+        "video_url": _media_url(job.get("video_path"), base, f"/jobs/{job['id']}/media"),
+        "subtitle_urls": {
+            fmt: f"{base}/jobs/{job['id']}/subtitles.{fmt}" for fmt in SUBTITLE_FORMATS
+        } if job.get("has_subtitles") else {},
+        "error": job.get("error", ""),
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+def expand_playlist_urls(playlist_url, limit=None):
+    """Return entry URLs of a playlist/profile URL (flat extraction, nothing downloaded).
+    At most limit entries, MAX_BATCH_URLS by default."""
+    if limit is None:
+        limit = MAX_BATCH_URLS
+    opts = {
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+        "quiet": True,
+        "playlistend": limit,
+        "http_headers": {"User-Agent": "Mozilla/5.0"},
+    }
+    import yt_dlp
+
+    source_url = normalize_x_url_for_ytdlp(playlist_url) if is_x_url(playlist_url) else playlist_url
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(source_url, download=False)
+    if not isinstance(info, dict):
+        return []
+    entries = info.get("entries")
+    if entries is None:
+        # Not a playlist after all: treat as a single video.
+        return [info.get("webpage_url") or playlist_url]
+    urls = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        entry_url = entry.get("webpage_url") or entry.get("url")
+        if isinstance(entry_url, str) and entry_url.startswith(("http://", "https://")):
+            urls.append(entry_url)
+        if len(urls) >= limit:
+            break
+    return urls
+
+
+def _requested_word_timestamps(content):
+    """Per-request "word_timestamps" flag, falling back to the WORD_TIMESTAMPS default."""
+    value = content.get("word_timestamps")
+    return value if isinstance(value, bool) else bool(WORD_TIMESTAMPS)
+
+
 @app.route('/set_url', methods=['POST'])
 def set_url():
     content = request.json or {}
@@ -393,38 +1438,281 @@ def set_url():
         print(f"[!] Rejected invalid URL: {repr(new_url)[:50]}")
         return jsonify({"status": "Invalid URL", "error": "Provide a valid TikTok, Instagram, or YouTube URL"}), 400
     new_key = normalize_url_for_dedup(new_url)
+    word_timestamps = _requested_word_timestamps(content)
     with lock:
         requested_save_mode = bool(SAVE_VIDEOS_LOCALLY)
         current_key = normalize_url_for_dedup(data.get("url", ""))
         current_save_mode = bool(data.get("save_videos_locally", requested_save_mode))
-        if new_key and new_key == current_key and current_save_mode == requested_save_mode:
-            return jsonify({"status": "URL already set"})
+        current_job = jobs.get(data.get("job_id", ""))
+        current_words = bool(current_job and current_job["word_timestamps"])
+        current_cancelled = bool(current_job and current_job["status"] == JOB_CANCELLED)
+        if (new_key and new_key == current_key and current_save_mode == requested_save_mode
+                and (current_words or not word_timestamps) and not current_cancelled):
+            return jsonify({"status": "URL already set", "job_id": data.get("job_id", "")})
+        previous_job_id = data.get("job_id", "")
+        previous_queued = bool(current_job and current_job["status"] == JOB_QUEUED)
+        job = _new_job(new_url, requested_save_mode, word_timestamps=word_timestamps)
         data["url"] = new_url
+        data["job_id"] = job["id"]
         data["transcription"] = ""
         data["save_videos_locally"] = requested_save_mode
         _delete_runtime_video_if_any()
         print(f"[+] URL received: {data['url']} (save locally: {'ON' if requested_save_mode else 'OFF'})")
-    return jsonify({"status": "URL received"})
+        journal_records = [{"op": "job", "job": dict(job)}, {"op": "current", "job_id": job["id"]}]
+    _journal_append(*journal_records)
+    try:
+        archive_submissions([job])
+    except sqlite3.Error as e:
+        print(f"[!] Failed to record submission in {ARCHIVE_DB}: {e}")
+    if previous_queued:
+        cancel_job(previous_job_id)  # worker() only runs the latest /set_url job; this one would never start
+    elif LATEST_WINS and previous_job_id:
+        cancel_job(previous_job_id)  # free the CPU for the URL the user actually wants now
+    return jsonify({"status": "URL received", "job_id": job["id"]})
+
+
+@app.route('/set_urls', methods=['POST'])
+def set_urls():
+    """Queue many URLs (and/or a playlist/profile URL) for bounded parallel processing."""
+    content = request.json or {}
+    raw_urls = content.get("urls") or []
+    if isinstance(raw_urls, str):
+        raw_urls = raw_urls.split()  # Shortcuts may send a newline-separated text list
+    if not isinstance(raw_urls, list):
+        return jsonify({"status": "Invalid request", "error": "'urls' must be a list of URLs"}), 400
+    urls = [u.strip() for u in raw_urls if isinstance(u, str) and u.strip()]
+
+    playlist_url = (content.get("playlist_url") or "").strip()
+    if playlist_url:
+        if not is_valid_video_url(playlist_url):
+            return jsonify({"status": "Invalid URL", "error": "Provide a valid playlist or profile URL"}), 400
+        try:
+            urls.extend(expand_playlist_urls(playlist_url))
+        except Exception as e:
+            print(f"[-] Could not expand playlist {playlist_url}: {e}")
+            return jsonify({"status": "Playlist error", "error": f"Could not expand playlist: {e}"}), 502
+
+    if not urls:
+        return jsonify({"status": "Invalid request", "error": "Provide 'urls' or 'playlist_url'"}), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return jsonify({"status": "Too many URLs", "error": f"At most {MAX_BATCH_URLS} URLs per batch"}), 400
+
+    word_timestamps = _requested_word_timestamps(content)
+    rejected = []
+    duplicates = 0
+    new_job_ids = []
+    with lock:
+        save_mode = bool(SAVE_VIDEOS_LOCALLY)
+        batch_id = uuid.uuid4().hex
+        # Reuse finished or in-flight jobs for the same video instead of downloading it again.
+        # A /set_url job that hasn't started yet may be replaced (and cancelled) before worker() runs it.
+        known = {
+            (j["key"], j["save_videos_locally"]): j["id"]
+            for j in jobs.values()
+            if j["key"] and j["status"] not in (JOB_ERROR, JOB_CANCELLED)
+            and (j["word_timestamps"] or not word_timestamps)
+            and not (j["batch_id"] is None and j["status"] == JOB_QUEUED)
+        }
+        seen_keys = set()
+        job_ids = []
+        for url in urls:
+            if not is_valid_video_url(url):
+                rejected.append(url)
+                continue
+            key = normalize_url_for_dedup(url)
+            if key in seen_keys:
+                duplicates += 1
+                continue
+            seen_keys.add(key)
+            job_id = known.get((key, save_mode))
+            if job_id is None:
+                job_id = _new_job(url, save_mode, batch_id=batch_id, word_timestamps=word_timestamps)["id"]
+                new_job_ids.append(job_id)
+            job_ids.append(job_id)
+        batches[batch_id] = {"id": batch_id, "job_ids": job_ids, "created_at": time.time()}
+        journal_records = [{"op": "job", "job": dict(jobs[j])} for j in new_job_ids]
+        journal_records.append({"op": "batch", "batch": dict(batches[batch_id])})
+
+    _journal_append(*journal_records)
+    try:
+        archive_submissions([r["job"] for r in journal_records if r["op"] == "job"])
+    except sqlite3.Error as e:
+        print(f"[!] Failed to record submissions in {ARCHIVE_DB}: {e}")
+    for job_id in new_job_ids:
+        job_queue.put(job_id)
+    print(f"[+] Batch {batch_id}: {len(new_job_ids)} queued, {len(job_ids) - len(new_job_ids)} reused, "
+          f"{duplicates} duplicates, {len(rejected)} rejected")
+    return jsonify({
+        "status": "Batch received",
+        "batch_id": batch_id,
+        "job_ids": job_ids,
+        "queued": len(new_job_ids),
+        "duplicates": duplicates,
+        "rejected": rejected,
+        "progress_url": f"/batches/{batch_id}",
+    })
+
+
+@app.route('/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """Aggregate progress for a /set_urls batch."""
+    base = _request_base_url()
+    with lock:
+        batch = batches.get(batch_id)
+        if batch is None:
+            return jsonify({"error": "Unknown batch"}), 404
+        job_list = [_job_summary(jobs[j], base) for j in batch["job_ids"] if j in jobs]
+
+    counts = {state: 0 for state in JOB_STATES}
+    for job in job_list:
+        counts[job["status"]] += 1
+    total = len(job_list)
+    finished = sum(counts[state] for state in JOB_FINAL_STATES)
+    return jsonify({
+        "batch_id": batch_id,
+        "total": total,
+        "finished": finished,
+        "counts": counts,
+        "progress": round(finished / total, 3) if total else 1.0,
+        "complete": finished == total,
+        "jobs": job_list,
+    })
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    base = _request_base_url()
+    with lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Unknown job"}), 404
+        return jsonify(_job_summary(job, base))
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job_route(job_id):
+    """Stop a queued or running job (download, ffmpeg and transcription are all interrupted)."""
+    job = cancel_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job["status"] in (JOB_DONE, JOB_ERROR):
+        return jsonify({"status": f"Job already {job['status']}", "job_id": job_id}), 409
+    return jsonify({"status": "Cancel requested", "job_id": job_id, "job_status": job["status"]})
+
+
+@app.route('/jobs/<job_id>/media', methods=['GET'])
+def serve_job_media(job_id):
+    """Serve a job's downloaded media regardless of where it was saved."""
+    with lock:
+        job = jobs.get(job_id)
+        path = job.get("video_path") if job else None
+
+    if not path or not os.path.exists(path):
+        return jsonify({"error": "No media available"}), 404
+
+    return send_file(path, conditional=True)
+
+
+@app.route('/jobs/<job_id>/subtitles.<fmt>', methods=['GET'])
+def serve_job_subtitles(job_id, fmt):
+    """Serve SRT/VTT/JSON captions rendered from the job's single Whisper pass."""
+    if fmt not in SUBTITLE_FORMATS or not re.fullmatch(r"[0-9a-f]{32}", job_id):
+        return jsonify({"error": "Unknown subtitle format"}), 404
+    path = SUBTITLE_DIR / f"{job_id}.{fmt}"
+    if not path.exists():
+        # Files were removed (or predate this job's archive row): re-render from stored segments.
+        try:
+            segments = archived_segments(job_id)
+        except sqlite3.Error as e:
+            print(f"[-] Subtitle lookup failed: {e}")
+            segments = None
+        if not segments:
+            return jsonify({"error": "No subtitles for this job"}), 404
+        write_subtitle_files(job_id, segments)
+    return send_file(path, mimetype=SUBTITLE_FORMATS[fmt], conditional=True)
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Full-text search over archived transcripts: /search?q=words&limit=20&offset=0."""
+    q = (request.args.get("q") or "").strip()
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    if not q:
+        return jsonify({"error": "Provide a search query with ?q="}), 400
+    started = time.perf_counter()
+    try:
+        results, has_more = search_transcripts(q, limit=limit, offset=offset)
+    except sqlite3.Error as e:
+        print(f"[-] Transcript search failed: {e}")
+        return jsonify({"error": f"Search failed: {e}"}), 500
+    return jsonify({
+        "query": q,
+        "results": results,
+        "has_more": has_more,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+    })
+
+
+@app.route('/history', methods=['GET'])
+def history():
+    """Paginated list of recently processed URLs: /history?page=1&per_page=20."""
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 20, type=int), 1), 100)
+    try:
+        items, total = transcript_history(page=page, per_page=per_page)
+    except sqlite3.Error as e:
+        print(f"[-] History lookup failed: {e}")
+        return jsonify({"error": f"History unavailable: {e}"}), 500
+    return jsonify({
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "has_more": page * per_page < total,
+        "items": items,
+    })
+
+
+@app.route('/status', methods=['GET'])
+def get_status():
+    """Queue depth, job counts, per-host in-flight downloads, recent throttle events and transcription workers."""
+    hosts, throttle_events = scheduler_status()
+    transcription_workers = None
+    if REMOTE_TRANSCRIPTION:
+        try:
+            transcription_workers = transcription_queue_status()
+        except sqlite3.Error as e:
+            transcription_workers = {"error": str(e)}
+    with lock:
+        counts = {state: 0 for state in JOB_STATES}
+        for job in jobs.values():
+            counts[job["status"]] += 1
+        current_job_id = data.get("job_id", "")
+    return jsonify({
+        "current_job_id": current_job_id,
+        "queue_depth": job_queue.qsize(),
+        "max_parallel_downloads": MAX_PARALLEL_DOWNLOADS,
+        "jobs": counts,
+        "hosts": hosts,
+        "throttle_events": throttle_events,
+        "transcription_workers": transcription_workers,
+        "whisper": {
+            "models": list(WHISPER_MODELS),
+            "pinned_model": WHISPER_MODEL or None,
+            "target_latency_seconds": TARGET_LATENCY_SECONDS,
+            "loaded_models": list(_whisper_models),
+            "seconds_per_audio_second": {k: round(v, 3) for k, v in _model_speed.items()},
+        },
+    })
+
 
 @app.route('/get_transcription', methods=['GET'])
 def get_transcription():
-    url = ""
+    base = _request_base_url()
     with lock:
-        # Build video URL if file exists
-        if video_path and os.path.exists(video_path):
-            base = request.host_url[:-1] if request.host_url.endswith("/") else request.host_url
-            if _is_path_inside(video_path, VIDEO_DIR):
-                rel = Path(video_path).resolve().relative_to(BASE_DIR).as_posix()
-                url = f"{base}/{rel}"
-            elif _is_path_inside(video_path, RUNTIME_VIDEO_DIR):
-                name = Path(video_path).name
-                url = f"{base}/runtime_videos/{name}"
-            else:
-                url = f"{base}/media/current"
-
         return jsonify({
             "transcription": data.get("transcription", ""),
-            "video_url": url
+            "video_url": _media_url(video_path, base, "/media/current"),
         })
 
 
@@ -445,274 +1733,639 @@ def serve_runtime_video(filename):
     """Serve runtime-only video files by actual filename."""
     return send_from_directory(RUNTIME_VIDEO_DIR, filename, conditional=True)
 
+
+def _ffmpeg_dir_is_valid(path):
+    """Cheap check that a cached ffmpeg location still holds ffmpeg and ffprobe."""
+    if not path or not isinstance(path, str):
+        return False
+    suffix = ".exe" if os.name == "nt" else ""
+    bin_dir = Path(path)
+    return (bin_dir / f"ffmpeg{suffix}").is_file() and (bin_dir / f"ffprobe{suffix}").is_file()
+
+
+def _ensure_ffmpeg_bin():
+    """Locate ffmpeg once (cached in app_settings.json) and register it with yt-dlp."""
+    global _ffmpeg_bin
+    with _ffmpeg_lock:
+        if _ffmpeg_bin is None:
+            started = time.perf_counter()
+            cached = load_app_settings().get("ffmpeg_location")
+            if _ffmpeg_dir_is_valid(cached):
+                _ffmpeg_bin = cached
+                _startup_timings.append(("ffmpeg location (cached)", time.perf_counter() - started))
+            else:
+                # Full search can walk the whole WinGet packages tree; remember the result.
+                _ffmpeg_bin = find_ffmpeg_bin()
+                _startup_timings.append(("ffmpeg location (search)", time.perf_counter() - started))
+                if _ffmpeg_bin:
+                    persist_app_settings(ffmpeg_location=_ffmpeg_bin)
+            if _ffmpeg_bin:
+                from yt_dlp.postprocessor import FFmpegPostProcessor
+
+                FFmpegPostProcessor._ffmpeg_location.set(_ffmpeg_bin)
+                print(f"[+] Using ffmpeg from: {_ffmpeg_bin}")
+            else:
+                print("[!] ffmpeg not found. Install it for full support (Instagram, postprocessing).")
+            print(f"[+] Videos save to: {VIDEO_DIR}")
+            print(f"[+] Runtime-only videos save to: {RUNTIME_VIDEO_DIR}")
+            if TRANSCRIBE_ENABLED:
+                print(f"[+] Audio saves to: {AUDIO_DIR}")
+        return _ffmpeg_bin
+
+
+def choose_whisper_model(duration, backlog=0):
+    """Most accurate model expected to get through duration seconds of audio, plus backlog similar
+    jobs, within TARGET_LATENCY_SECONDS. Falls back to the fastest model."""
+    if WHISPER_MODEL:
+        return WHISPER_MODEL
+    chosen = WHISPER_MODELS[0]
+    for name in WHISPER_MODELS:
+        if duration * _model_speed.get(name, 1.0) * (backlog + 1) <= TARGET_LATENCY_SECONDS:
+            chosen = name
+    return chosen
+
+
+def _load_whisper_model(name):
+    """Return a loaded model, keeping the WHISPER_MODEL_CACHE_SIZE most recently used. Caller holds _model_lock."""
+    model = _whisper_models.get(name)
+    if model is not None:
+        _whisper_models.move_to_end(name)
+        return model
+    import whisper
+    while len(_whisper_models) >= max(1, WHISPER_MODEL_CACHE_SIZE):
+        evicted, _ = _whisper_models.popitem(last=False)
+        print(f"[+] Unloaded Whisper model: {evicted}")
+    print(f"[+] Loading Whisper model: {name}")
+    model = whisper.load_model(name, device="cpu")
+    _install_whisper_cancel_hook()
+    _whisper_models[name] = model
+    return model
+
+
+def transcribe_media(path, word_timestamps=False, backlog=0):
+    """Transcribe a media file with Whisper, choosing the model per job (see choose_whisper_model).
+    Returns (text, segments, model name); one transcription runs at a time."""
+    import whisper
+
+    # Decode once: the sample count gives the duration the policy needs, and transcribe() reuses it.
+    audio = whisper.load_audio(path)
+    duration = len(audio) / whisper.audio.SAMPLE_RATE
+    with _model_lock:
+        _raise_if_cancelled()  # cancelled while waiting for the lock: don't load a model for it
+        name = choose_whisper_model(duration, backlog)
+        model = _load_whisper_model(name)
+        print(f"[+] Transcribing with {name} ({duration:.0f}s audio, {backlog} waiting): {path}")
+        options = {"word_timestamps": True} if word_timestamps else {}
+        started = time.perf_counter()
+        result = model.transcribe(audio, fp16=False, **options)
+        if duration >= 5:
+            # Moving average so the policy tracks this machine's actual speed
+            observed = (time.perf_counter() - started) / duration
+            _model_speed[name] = 0.7 * _model_speed.get(name, observed) + 0.3 * observed
+    text = (result.get("text") or "").strip() or "..."
+    segments = []
+    for seg in result.get("segments") or []:
+        segment = {"start": round(seg["start"], 2), "end": round(seg["end"], 2), "text": seg["text"].strip()}
+        if word_timestamps:
+            segment["words"] = [
+                {"start": round(w["start"], 2), "end": round(w["end"], 2), "word": w["word"].strip()}
+                for w in seg.get("words") or []
+            ]
+        segments.append(segment)
+    return text, segments, name
+
+
+def download_media(job_id, url, save_mode, ffmpeg_bin, cancel_event=None):
+    """Download url with yt-dlp as <job_id>.*. Returns (video_path, audio_path); either may be None.
+    Setting cancel_event aborts the download (JobCancelled) at the next progress update."""
+    import yt_dlp
+
+    video_home_dir = VIDEO_DIR if save_mode else RUNTIME_VIDEO_DIR
+    outtmpl = str(video_home_dir / f"{job_id}.%(ext)s")
+    preexisting_files = {p.resolve() for p in video_home_dir.iterdir() if p.is_file()}
+
+    has_ffmpeg = ffmpeg_bin is not None
+    limits = _host_limits(platform_for_url(url))
+    is_youtube = is_youtube_url(url)
+
+    # Prefer iPhone-friendly codecs for YouTube. Keep existing behavior for other platforms.
+    if is_youtube:
+        ffmpeg_format_selector = (
+            "bv*[vcodec^=avc1]+ba[acodec^=mp4a]/"
+            "b[vcodec^=avc1][ext=mp4]/"
+            "bv*[ext=mp4]+ba[ext=m4a]/"
+            "bv*+ba/best"
+        )
+        noffmpeg_format_selector = "best[vcodec^=avc1][ext=mp4]/best[ext=mp4]/best"
+    else:
+        ffmpeg_format_selector = "bv*+ba/best"
+        noffmpeg_format_selector = "best[ext=mp4]/best"
+
+    if has_ffmpeg and TRANSCRIBE_ENABLED:
+        ydl_opts = {
+            "paths": {"home": str(video_home_dir), "temp": str(video_home_dir)},
+            "outtmpl": outtmpl,
+            "format": ffmpeg_format_selector,
+            "hls_prefer_native": False,
+            "skip_unavailable_fragments": True,
+            "fragment_retries": limits["fragment_retries"],
+            "retries": limits["retries"],
+            "concurrent_fragment_downloads": limits["fragment_concurrency"],
+            "noplaylist": True,
+            "keepvideo": True,
+            "postprocessors": [
+                {"key": "FFmpegVideoConvertor", "preferedformat": "mp4"},
+                {"key": "FFmpegExtractAudio", "preferredcodec": "m4a", "preferredquality": "0"},
+            ],
+            "merge_output_format": "mp4",
+            "http_headers": {"User-Agent": "Mozilla/5.0"},
+            "extractor_args": {"youtube": {"player_client": ["web", "ios", "android"]}},
+        }
+    elif has_ffmpeg and not TRANSCRIBE_ENABLED:
+        ydl_opts = {
+            "paths": {"home": str(video_home_dir), "temp": str(video_home_dir)},
+            "outtmpl": outtmpl,
+            "format": ffmpeg_format_selector,
+            "hls_prefer_native": False,
+            "skip_unavailable_fragments": True,
+            "fragment_retries": limits["fragment_retries"],
+            "retries": limits["retries"],
+            "concurrent_fragment_downloads": limits["fragment_concurrency"],
+            "noplaylist": True,
+            "postprocessors": [
+                {"key": "FFmpegVideoConvertor", "preferedformat": "mp4"},
+            ],
+            "merge_output_format": "mp4",
+            "http_headers": {"User-Agent": "Mozilla/5.0"},
+            "extractor_args": {"youtube": {"player_client": ["web", "ios", "android"]}},
+        }
+    else:
+        # No ffmpeg: use single-format only (no merge), no postprocessors
+        # Instagram DASH may still fail - install ffmpeg for full support
+        ydl_opts = {
+            "paths": {"home": str(video_home_dir), "temp": str(video_home_dir)},
+            "outtmpl": outtmpl,
+            "format": noffmpeg_format_selector,
+            "hls_prefer_native": False,
+            "skip_unavailable_fragments": True,
+            "fragment_retries": limits["fragment_retries"],
+            "retries": limits["retries"],
+            "concurrent_fragment_downloads": limits["fragment_concurrency"],
+            "noplaylist": True,
+            "postprocessors": [],
+            "http_headers": {"User-Agent": "Mozilla/5.0"},
+            "extractor_args": {"youtube": {"player_client": ["web", "ios", "android"]}},
+        }
+    download_url = normalize_x_url_for_ytdlp(url) if is_x_url(url) else url
+
+    # For X URLs, detect GIFs strictly from yt-dlp metadata markers.
+    convert_to_gif = False
+
+    # Capture actual output path from yt-dlp (X/Twitter may use different naming)
+    downloaded_paths = []
+    download_meta = {"last_info": None}
+
+    def check_cancelled(d=None):
+        # Checked through the closure, not _job_context: yt-dlp calls hooks from its
+        # fragment-download threads when concurrent_fragment_downloads > 1.
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress_hook(d):
+        check_cancelled()  # aborts the download between chunks/fragments
+        if d.get("status") == "finished":
+            info = d.get("info_dict") or {}
+            if is_x_url(url):
+                download_meta["last_info"] = info
+            path = info.get("_filename")
+            if path and os.path.isfile(path):
+                ext = (Path(path).suffix or "").lower()
+                if ext != ".m4a":  # exclude extracted audio only
+                    downloaded_paths.append(path)
+
+    ydl_opts["progress_hooks"] = [progress_hook]
+    ydl_opts["postprocessor_hooks"] = [check_cancelled]
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([download_url])
+
+    if is_x_url(url) and ffmpeg_bin:
+        info = download_meta.get("last_info")
+        if isinstance(info, dict):
+            convert_to_gif = is_x_gif_from_info(info)
+        else:
+            # Fallback to a metadata-only probe if hook info is unavailable.
+            try:
+                probe_opts = {"noplaylist": True, "quiet": True}
+                with yt_dlp.YoutubeDL(probe_opts) as ydl:
+                    convert_to_gif = is_likely_x_gif(ydl, download_url)
+            except Exception:
+                convert_to_gif = False
+
+    # Find the downloaded file: prefer yt-dlp's actual path, else our expected path
+    saved_mp4 = str(video_home_dir / f"{job_id}.mp4")
+    saved_audio_m4a = str(video_home_dir / f"{job_id}.m4a")
+    downloaded_video = None
+
+    def is_candidate_media(path_obj):
+        if not path_obj.exists() or not path_obj.is_file():
+            return False
+        ext = path_obj.suffix.lower()
+        return ext not in (".m4a", ".part", ".tmp", ".ytdl")
+
+    def media_rank(path_obj):
+        ext = path_obj.suffix.lower()
+        if ext == ".mp4":
+            return (0, -path_obj.stat().st_mtime)
+        if ext == ".gif":
+            return (1, -path_obj.stat().st_mtime)
+        return (2, -path_obj.stat().st_mtime)
+
+    if downloaded_paths:
+        # Prefer the most recent hook path that still exists.
+        for raw_path in reversed(downloaded_paths):
+            p = Path(raw_path).resolve()
+            if not is_candidate_media(p):
+                continue
+            try:
+                p.relative_to(BASE_DIR)
+                downloaded_video = str(p)
+                break
+            except ValueError:
+                continue  # path outside BASE_DIR, use fallback
+    # Progress hooks may point to a pre-conversion file (e.g. .webm) that got replaced.
+    if downloaded_video and not os.path.exists(downloaded_video):
+        downloaded_video = None
+    if not downloaded_video and os.path.exists(saved_mp4):
+        downloaded_video = saved_mp4
+    if not downloaded_video:
+        # Fallback: look for files with expected job-id prefix.
+        candidates = [p for p in video_home_dir.glob(f"{job_id}.*") if is_candidate_media(p)]
+        if candidates:
+            candidates.sort(key=media_rank)
+            downloaded_video = str(candidates[0])
+    if not downloaded_video:
+        # Final fallback: detect newly created files even if name doesn't match job_id.
+        post_files = {p.resolve() for p in video_home_dir.iterdir() if p.is_file()}
+        new_files = [p for p in (post_files - preexisting_files) if is_candidate_media(p)]
+        if new_files:
+            new_files.sort(key=media_rank)
+            downloaded_video = str(new_files[0])
+
+    # Convert X GIFs from mp4 to actual .gif BEFORE exposing the video
+    # (avoids race where Shortcut gets mp4 URL before conversion completes)
+    final_video = None
+    if downloaded_video:
+        if convert_to_gif and ffmpeg_bin:
+            gif_path = str(Path(downloaded_video).with_suffix(".gif"))
+            if convert_mp4_to_gif(ffmpeg_bin, downloaded_video, gif_path):
+                final_video = gif_path
+                try:
+                    os.remove(downloaded_video)
+                    print(f"[+] Converted to GIF, removed original: {downloaded_video}")
+                except OSError as e:
+                    print(f"[+] Converted to GIF: {final_video} (could not remove original: {e})")
+            else:
+                final_video = downloaded_video
+                print(f"[-] GIF conversion failed, keeping mp4")
+        else:
+            final_video = downloaded_video
+        if final_video:
+            print(f"[+] Video saved: {final_video}")
+            if _is_path_inside(final_video, RUNTIME_VIDEO_DIR):
+                print("[+] Video is temporary (not saved in static/videos).")
+
+    # Move audio to AUDIO_DIR when transcribing (videos stay in VIDEO_DIR)
+    audio_path = None
+    if TRANSCRIBE_ENABLED and os.path.exists(saved_audio_m4a):
+        audio_path = str(AUDIO_DIR / f"{job_id}.m4a")
+        shutil.move(saved_audio_m4a, audio_path)
+        print(f"[+] Audio saved: {audio_path}")
+
+    return final_video, audio_path
+
+
+def _run_job(job_id):
+    """Download (and transcribe) a registered job, mirroring results to /get_transcription if current."""
+    global video_path, video_is_ephemeral
+    job = _update_job(job_id)
+    if job is None or job["status"] in JOB_FINAL_STATES:
+        return
+    url = job["url"]
+    with lock:
+        cancel_event = _cancel_events.setdefault(job_id, Event())
+    _job_context.job_id = job_id
+    _job_context.cancel_event = cancel_event
+    # A job replayed from the journal resumes after its last completed stage.
+    downloaded_video = job["video_path"] if job["video_path"] and os.path.exists(job["video_path"]) else None
+    audio_path = job["audio_path"] if job["audio_path"] and os.path.exists(job["audio_path"]) else None
+    download_finished = bool(downloaded_video or audio_path)
+    if download_finished:
+        print(f"[+] Resuming after download: {url}")
+    else:
+        print(f"[+] Processing new URL: {url}")
+
+    try:
+        ffmpeg_bin = _ensure_ffmpeg_bin()
+        platform = platform_for_url(url)
+        throttled_attempts = 0
+        while not download_finished:
+            acquire_download_slot(platform)
+            _update_job(job_id, status=JOB_DOWNLOADING)
+            try:
+                downloaded_video, audio_path = download_media(
+                    job_id, url, job["save_videos_locally"], ffmpeg_bin, cancel_event=cancel_event
+                )
+                record_download_success(platform)
+                download_finished = True
+            except Exception as e:
+                reason = throttle_reason(e)
+                if reason is None:
+                    raise
+                record_throttle(platform, reason)
+                throttled_attempts += 1
+                if throttled_attempts > THROTTLE_RETRIES:
+                    raise
+            finally:
+                release_download_slot(platform)
+        _update_job(job_id, video_path=downloaded_video, audio_path=audio_path)
+        with lock:
+            if _is_current_job(job_id):
+                video_path = downloaded_video
+                video_is_ephemeral = bool(downloaded_video) and _is_path_inside(downloaded_video, RUNTIME_VIDEO_DIR)
+
+        transcription, segments, model = "", [], job.get("whisper_model", "")
+        if TRANSCRIBE_ENABLED and job["transcription"]:
+            # Transcribed (and archived) before a restart; reuse instead of running Whisper again.
+            transcription = job["transcription"]
+            try:
+                segments = archived_segments(job_id) or []
+            except sqlite3.Error:
+                segments = []
+        elif TRANSCRIBE_ENABLED:
+            _raise_if_cancelled()
+            # Transcribe downloaded media (prefer extracted m4a for speed)
+            source_for_transcription = audio_path if audio_path and os.path.exists(audio_path) else downloaded_video
+            if not source_for_transcription or not os.path.exists(source_for_transcription):
+                raise FileNotFoundError("No media file was downloaded")
+            if REMOTE_TRANSCRIPTION:
+                _update_job(job_id, status=JOB_TRANSCRIBING, remote_transcription=True)
+                enqueue_transcription(job_id, source_for_transcription, job["word_timestamps"])
+                print(f"[+] Queued for transcription workers: {url}")
+                return  # collect_transcriptions() completes the job once a worker pushes the result
+            _update_job(job_id, status=JOB_TRANSCRIBING)
+            transcription, segments, model = transcribe_media(
+                source_for_transcription, word_timestamps=job["word_timestamps"], backlog=_transcription_backlog(job_id)
+            )
+
+        _raise_if_cancelled()
+        _complete_job(_update_job(job_id), transcription, segments, model)
+
+    except Exception as e:
+        if cancel_event.is_set():
+            # JobCancelled, or yt-dlp/ffmpeg failing because its child process was killed.
+            print(f"[+] Job cancelled: {url}")
+            if not download_finished:
+                _remove_job_files(job_id)  # keep completed media; drop partial downloads
+            _update_job(job_id, status=JOB_CANCELLED)
+        else:
+            print(f"[-] Error occurred: {e}")
+            traceback.print_exc()
+            _update_job(job_id, status=JOB_ERROR, error=str(e))
+        with lock:
+            if _is_current_job(job_id) and not data.get("transcription"):
+                data["transcription"] = "..."
+
+    finally:
+        _job_context.job_id = None
+        _job_context.cancel_event = None
+        with lock:
+            _job_children.pop(job_id, None)
+
+
+def _transcription_backlog(job_id):
+    """Jobs that will be transcribed alongside or after job_id: in transcription or still queued."""
+    with lock:
+        transcribing = sum(1 for j in jobs.values() if j["status"] == JOB_TRANSCRIBING and j["id"] != job_id)
+    return transcribing + job_queue.qsize()
+
+
+def _complete_job(job, transcription, segments, model=""):
+    """Write subtitles, archive and publish a job's result, then mark it done."""
+    job_id = job["id"]
+    if transcription and transcription != job["transcription"]:
+        print(f"[+] Transcription completed: {transcription[:50]}{'...' if len(transcription) > 50 else ''}")
+    if segments and not job["has_subtitles"]:
+        try:
+            write_subtitle_files(job_id, segments)
+            _update_job(job_id, has_subtitles=True)
+        except OSError as e:
+            print(f"[!] Failed to write subtitles for job {job_id}: {e}")
+
+    # Archive before publishing so /history already lists the job once clients see it finish
+    try:
+        archive_transcript(job, transcription, segments)
+    except Exception as e:
+        print(f"[!] Failed to archive transcript in {ARCHIVE_DB}: {e}")
+
+    # Update transcription to server immediately (so shortcut gets it even if file write fails)
+    _update_job(job_id, transcription=transcription, whisper_model=model or "")
+    with lock:
+        is_current = _is_current_job(job_id)
+        if is_current:
+            if TRANSCRIBE_ENABLED:
+                data["transcription"] = transcription
+            elif job["video_path"]:
+                data["transcription"] = job["url"]
+
+    if is_current and TRANSCRIBE_ENABLED:
+        # Save transcription to a file in the same folder as this script
+        output_path = os.path.join(script_dir, "transcription.txt")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(transcription)
+        print(f"[+] Transcription saved to: {output_path}")
+
+    _update_job(job_id, status=JOB_DONE)
+
+
+def collect_transcriptions():
+    """REMOTE_TRANSCRIPTION: complete jobs whose transcription a --worker pushed back to the queue."""
+    while True:
+        time.sleep(TRANSCRIBE_POLL_INTERVAL)
+        try:
+            rows = finished_transcriptions()
+        except sqlite3.Error as e:
+            print(f"[!] Failed to read transcription queue {TRANSCRIBE_QUEUE_DB}: {e}")
+            continue
+        for row in rows:
+            job_id = row["job_id"]
+            job = _update_job(job_id)
+            if job is not None and job["status"] not in JOB_FINAL_STATES and job["status"] != JOB_TRANSCRIBING:
+                # Resumed after a restart and not back at the transcription stage yet: keep the
+                # result for _run_job, whose enqueue leaves this row in place.
+                continue
+            # Unknown or final jobs were cancelled meanwhile, or finished locally after a restart without workers.
+            if job is not None and job["status"] == JOB_TRANSCRIBING:
+                try:
+                    if row["state"] != "done":
+                        raise RuntimeError(row["error"] or "Transcription worker failed")
+                    print(f"[+] Transcription received from worker {row['worker']} ({row['model'] or 'unknown model'})")
+                    _complete_job(job, row["text"], json.loads(row["segments"] or "[]"), row["model"])
+                except Exception as e:
+                    print(f"[-] Error occurred: {e}")
+                    _update_job(job_id, status=JOB_ERROR, error=str(e))
+                    with lock:
+                        if _is_current_job(job_id) and not data.get("transcription"):
+                            data["transcription"] = "..."
+            try:
+                drop_transcription(job_id)
+            except sqlite3.Error as e:
+                print(f"[!] Failed to remove job {job_id} from {TRANSCRIBE_QUEUE_DB}: {e}")
+
+
+def _transcribe_leased(task, worker_name, media_root):
+    """Transcribe one leased queue row, heartbeating until it is done; stops if the lease is lost."""
+    job_id = task["job_id"]
+    media = Path(task["media_path"])
+    if not media.is_absolute():
+        media = Path(media_root) / media
+    cancel_event = Event()
+    done = Event()
+
+    def heartbeat():
+        while not done.wait(TRANSCRIBE_HEARTBEAT_SECONDS):
+            try:
+                still_ours = renew_transcription_lease(job_id, worker_name)
+            except sqlite3.Error as e:
+                print(f"[!] Heartbeat failed for job {job_id}: {e}")
+                continue
+            if not still_ours:
+                cancel_event.set()  # stops whisper at the next 30s window
+                return
+
+    Thread(target=heartbeat, daemon=True).start()
+    _job_context.job_id = job_id
+    _job_context.cancel_event = cancel_event
+    try:
+        if not media.exists():
+            raise FileNotFoundError(f"Media not found: {media} (check --media-root)")
+        try:
+            backlog = transcription_queue_status()["pending"]
+        except sqlite3.Error:
+            backlog = 0
+        text, segments, model = transcribe_media(
+            str(media), word_timestamps=bool(task["word_timestamps"]), backlog=backlog
+        )
+        if finish_transcription(job_id, worker_name, text=text, segments=segments, model=model):
+            print(f"[+] Transcription completed: {text[:50]}{'...' if len(text) > 50 else ''}")
+        else:
+            print(f"[!] Discarded result for job {job_id}: lease lost")
+    except JobCancelled:
+        print(f"[+] Stopped job {job_id}: cancelled or leased by another worker")
+    except KeyboardInterrupt:
+        finish_transcription(job_id, worker_name, release=True)
+        raise
+    except Exception as e:
+        print(f"[-] Error occurred: {e}")
+        traceback.print_exc()
+        finish_transcription(job_id, worker_name, error=str(e))
+    finally:
+        done.set()
+        _job_context.job_id = None
+        _job_context.cancel_event = None
+
+
+def run_transcription_worker(media_root):
+    """--worker: transcribe jobs from TRANSCRIBE_QUEUE_DB until interrupted (no server, no downloads)."""
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"[+] Transcription worker {worker_name}")
+    print(f"[+] Queue: {TRANSCRIBE_QUEUE_DB}")
+    print(f"[+] Media root: {media_root}")
+    while True:
+        try:
+            task = lease_transcription(worker_name)
+        except sqlite3.Error as e:
+            print(f"[!] Failed to read transcription queue {TRANSCRIBE_QUEUE_DB}: {e}")
+            task = None
+        if task is None:
+            time.sleep(TRANSCRIBE_POLL_INTERVAL)
+            continue
+        print(f"[+] Leased job {task['job_id']} (attempt {task['attempts'] + 1})")
+        _transcribe_leased(task, worker_name, media_root)
+
+
 def worker():
-    last_processed_key = ""
-    model = None  # Lazy-loaded when first URL needs transcription
-    ffmpeg_bin = None  # Lazy-loaded on first URL (speeds up startup)
+    """Process the URL set via /set_url (the Shortcut flow), one job at a time."""
+    last_processed_job = ""
 
     while True:
         with lock:
             url = data["url"]
-            requested_save_mode = bool(data.get("save_videos_locally", SAVE_VIDEOS_LOCALLY))
-
-        url_key = normalize_url_for_dedup(url)
-        request_key = f"{url_key}|save:{1 if requested_save_mode else 0}" if url_key else ""
-        if url and is_valid_video_url(url) and request_key and request_key != last_processed_key:
-            # Lazy-init ffmpeg on first URL (speeds up startup)
-            if ffmpeg_bin is None:
-                ffmpeg_bin = find_ffmpeg_bin()
-                if ffmpeg_bin:
-                    FFmpegPostProcessor._ffmpeg_location.set(ffmpeg_bin)
-                    print(f"[+] Using ffmpeg from: {ffmpeg_bin}")
-                else:
-                    print("[!] ffmpeg not found. Install it for full support (Instagram, postprocessing).")
-                print(f"[+] Videos save to: {VIDEO_DIR}")
-                print(f"[+] Runtime-only videos save to: {RUNTIME_VIDEO_DIR}")
-                if TRANSCRIBE_ENABLED:
-                    print(f"[+] Audio saves to: {AUDIO_DIR}")
+            job_id = data.get("job_id", "")
 
-            print(f"[+] Processing new URL: {url}")
+        if url and is_valid_video_url(url) and job_id and job_id != last_processed_job:
+            _run_job(job_id)
+            last_processed_job = job_id  # avoid endless retries on same request
 
-            try:
-                # Download new media with a unique id.
-                job_id = uuid.uuid4().hex
-                video_home_dir = VIDEO_DIR if requested_save_mode else RUNTIME_VIDEO_DIR
-                outtmpl = str(video_home_dir / f"{job_id}.%(ext)s")
-                preexisting_files = {p.resolve() for p in video_home_dir.iterdir() if p.is_file()}
-
-                has_ffmpeg = ffmpeg_bin is not None
-                is_youtube = is_youtube_url(url)
-
-                # Prefer iPhone-friendly codecs for YouTube. Keep existing behavior for other platforms.
-                if is_youtube:
-                    ffmpeg_format_selector = (
-                        "bv*[vcodec^=avc1]+ba[acodec^=mp4a]/"
-                        "b[vcodec^=avc1][ext=mp4]/"
-                        "bv*[ext=mp4]+ba[ext=m4a]/"
-                        "bv*+ba/best"
-                    )
-                    noffmpeg_format_selector = "best[vcodec^=avc1][ext=mp4]/best[ext=mp4]/best"
-                else:
-                    ffmpeg_format_selector = "bv*+ba/best"
-                    noffmpeg_format_selector = "best[ext=mp4]/best"
-
-                if has_ffmpeg and TRANSCRIBE_ENABLED:
-                    ydl_opts = {
-                        "paths": {"home": str(video_home_dir), "temp": str(video_home_dir)},
-                        "outtmpl": outtmpl,
-                        "format": ffmpeg_format_selector,
-                        "hls_prefer_native": False,
-                        "skip_unavailable_fragments": True,
-                        "fragment_retries": 20,
-                        "retries": 10,
-                        "concurrent_fragment_downloads": 8,
-                        "noplaylist": True,
-                        "keepvideo": True,
-                        "postprocessors": [
-                            {"key": "FFmpegVideoConvertor", "preferedformat": "mp4"},
-                            {"key": "FFmpegExtractAudio", "preferredcodec": "m4a", "preferredquality": "0"},
-                        ],
-                        "merge_output_format": "mp4",
-                        "http_headers": {"User-Agent": "Mozilla/5.0"},
-                        "extractor_args": {"youtube": {"player_client": ["web", "ios", "android"]}},
-                    }
-                elif has_ffmpeg and not TRANSCRIBE_ENABLED:
-                    ydl_opts = {
-                        "paths": {"home": str(video_home_dir), "temp": str(video_home_dir)},
-                        "outtmpl": outtmpl,
-                        "format": ffmpeg_format_selector,
-                        "hls_prefer_native": False,
-                        "skip_unavailable_fragments": True,
-                        "fragment_retries": 20,
-                        "retries": 10,
-                        "concurrent_fragment_downloads": 8,
-                        "noplaylist": True,
-                        "postprocessors": [
-                            {"key": "FFmpegVideoConvertor", "preferedformat": "mp4"},
-                        ],
-                        "merge_output_format": "mp4",
-                        "http_headers": {"User-Agent": "Mozilla/5.0"},
-                        "extractor_args": {"youtube": {"player_client": ["web", "ios", "android"]}},
-                    }
-                else:
-                    # No ffmpeg: use single-format only (no merge), no postprocessors
-                    # Instagram DASH may still fail - install ffmpeg for full support
-                    ydl_opts = {
-                        "paths": {"home": str(video_home_dir), "temp": str(video_home_dir)},
-                        "outtmpl": outtmpl,
-                        "format": noffmpeg_format_selector,
-                        "hls_prefer_native": False,
-                        "skip_unavailable_fragments": True,
-                        "fragment_retries": 20,
-                        "retries": 10,
-                        "concurrent_fragment_downloads": 8,
-                        "noplaylist": True,
-                        "postprocessors": [],
-                        "http_headers": {"User-Agent": "Mozilla/5.0"},
-                        "extractor_args": {"youtube": {"player_client": ["web", "ios", "android"]}},
-                    }
-                download_url = normalize_x_url_for_ytdlp(url) if is_x_url(url) else url
-
-                # For X URLs, detect GIFs strictly from yt-dlp metadata markers.
-                convert_to_gif = False
+        time.sleep(5)
 
-                # Capture actual output path from yt-dlp (X/Twitter may use different naming)
-                downloaded_paths = []
-                download_meta = {"last_info": None}
-
-                def progress_hook(d):
-                    if d.get("status") == "finished":
-                        info = d.get("info_dict") or {}
-                        if is_x_url(url):
-                            download_meta["last_info"] = info
-                        path = info.get("_filename")
-                        if path and os.path.isfile(path):
-                            ext = (Path(path).suffix or "").lower()
-                            if ext != ".m4a":  # exclude extracted audio only
-                                downloaded_paths.append(path)
-
-                ydl_opts["progress_hooks"] = [progress_hook]
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([download_url])
-
-                if is_x_url(url) and ffmpeg_bin:
-                    info = download_meta.get("last_info")
-                    if isinstance(info, dict):
-                        convert_to_gif = is_x_gif_from_info(info)
-                    else:
-                        # Fallback to a metadata-only probe if hook info is unavailable.
-                        try:
-                            probe_opts = {"noplaylist": True, "quiet": True}
-                            with yt_dlp.YoutubeDL(probe_opts) as ydl:
-                                convert_to_gif = is_likely_x_gif(ydl, download_url)
-                        except Exception:
-                            convert_to_gif = False
-
-                # Find the downloaded file: prefer yt-dlp's actual path, else our expected path
-                saved_mp4 = str(video_home_dir / f"{job_id}.mp4")
-                saved_audio_m4a = str(video_home_dir / f"{job_id}.m4a")
-                downloaded_video = None
-
-                def is_candidate_media(path_obj):
-                    if not path_obj.exists() or not path_obj.is_file():
-                        return False
-                    ext = path_obj.suffix.lower()
-                    return ext not in (".m4a", ".part", ".tmp", ".ytdl")
-
-                def media_rank(path_obj):
-                    ext = path_obj.suffix.lower()
-                    if ext == ".mp4":
-                        return (0, -path_obj.stat().st_mtime)
-                    if ext == ".gif":
-                        return (1, -path_obj.stat().st_mtime)
-                    return (2, -path_obj.stat().st_mtime)
-
-                if downloaded_paths:
-                    # Prefer the most recent hook path that still exists.
-                    for raw_path in reversed(downloaded_paths):
-                        p = Path(raw_path).resolve()
-                        if not is_candidate_media(p):
-                            continue
-                        try:
-                            p.relative_to(BASE_DIR)
-                            downloaded_video = str(p)
-                            break
-                        except ValueError:
-                            continue  # path outside BASE_DIR, use fallback
-                # Progress hooks may point to a pre-conversion file (e.g. .webm) that got replaced.
-                if downloaded_video and not os.path.exists(downloaded_video):
-                    downloaded_video = None
-                if not downloaded_video and os.path.exists(saved_mp4):
-                    downloaded_video = saved_mp4
-                if not downloaded_video:
-                    # Fallback: look for files with expected job-id prefix.
-                    candidates = [p for p in video_home_dir.glob(f"{job_id}.*") if is_candidate_media(p)]
-                    if candidates:
-                        candidates.sort(key=media_rank)
-                        downloaded_video = str(candidates[0])
-                if not downloaded_video:
-                    # Final fallback: detect newly created files even if name doesn't match job_id.
-                    post_files = {p.resolve() for p in video_home_dir.iterdir() if p.is_file()}
-                    new_files = [p for p in (post_files - preexisting_files) if is_candidate_media(p)]
-                    if new_files:
-                        new_files.sort(key=media_rank)
-                        downloaded_video = str(new_files[0])
-
-                # Convert X GIFs from mp4 to actual .gif BEFORE exposing video_path
-                # (avoids race where Shortcut gets mp4 URL before conversion completes)
-                global video_path, video_is_ephemeral
-                video_path = None
-                video_is_ephemeral = False
-                if downloaded_video:
-                    if convert_to_gif and ffmpeg_bin:
-                        gif_path = str(Path(downloaded_video).with_suffix(".gif"))
-                        if convert_mp4_to_gif(ffmpeg_bin, downloaded_video, gif_path):
-                            video_path = gif_path
-                            try:
-                                os.remove(downloaded_video)
-                                print(f"[+] Converted to GIF, removed original: {downloaded_video}")
-                            except OSError as e:
-                                print(f"[+] Converted to GIF: {video_path} (could not remove original: {e})")
-                        else:
-                            video_path = downloaded_video
-                            print(f"[-] GIF conversion failed, keeping mp4")
-                    else:
-                        video_path = downloaded_video
-                    if video_path:
-                        video_is_ephemeral = _is_path_inside(video_path, RUNTIME_VIDEO_DIR)
-                        print(f"[+] Video saved: {video_path}")
-                        if video_is_ephemeral:
-                            print("[+] Video is temporary (not saved in static/videos).")
-                        if not TRANSCRIBE_ENABLED:
-                            with lock:
-                                data["transcription"] = url
-
-                # Move audio to AUDIO_DIR when transcribing (videos stay in VIDEO_DIR)
-                if TRANSCRIBE_ENABLED and os.path.exists(saved_audio_m4a):
-                    dest_m4a = str(AUDIO_DIR / f"{job_id}.m4a")
-                    shutil.move(saved_audio_m4a, dest_m4a)
-                    saved_audio_m4a = dest_m4a
-                    print(f"[+] Audio saved: {dest_m4a}")
-
-                if TRANSCRIBE_ENABLED:
-                    # Lazy-load Whisper on first use (speeds up startup)
-                    if model is None:
-                        print("[+] Loading Whisper model (first transcription)...")
-                        import whisper
-                        model = whisper.load_model("base", device="cpu")
-                    # Transcribe downloaded media (prefer extracted m4a for speed)
-                    source_for_transcription = saved_audio_m4a if os.path.exists(saved_audio_m4a) else video_path
-                    if not source_for_transcription or not os.path.exists(source_for_transcription):
-                        raise FileNotFoundError("No media file was downloaded")
-                    print(f"[+] Transcribing: {source_for_transcription}")
-                    result = model.transcribe(source_for_transcription, fp16=False)
-                    transcription = (result.get("text") or "").strip()
-                    if not transcription:
-                        transcription = "..."
-
-                    # Update transcription to server immediately (so shortcut gets it even if file write fails)
-                    with lock:
-                        data["transcription"] = transcription
-                    print(f"[+] Transcription completed: {transcription[:50]}{'...' if len(transcription) > 50 else ''}")
 
-                    # Save transcription to a file in the same folder as this script
-                    output_path = os.path.join(script_dir, "transcription.txt")
-                    with open(output_path, "w", encoding="utf-8") as f:
-                        f.write(transcription)
-                    print(f"[+] Transcription saved to: {output_path}")
+def batch_worker():
+    """Process /set_urls jobs; MAX_PARALLEL_DOWNLOADS of these threads run concurrently."""
+    while True:
+        job_id = job_queue.get()
+        try:
+            _run_job(job_id)
+        finally:
+            job_queue.task_done()
 
-                last_processed_key = request_key
 
-            except Exception as e:
-                print(f"[-] Error occurred: {e}")
-                traceback.print_exc()
-                last_processed_key = request_key  # avoid endless retries on same request
-                with lock:
-                    if not data.get("transcription"):
-                        data["transcription"] = "..."
+def wait_for_server(timeout=30):
+    """Poll the local server until / answers. Returns True once it does."""
+    from urllib.request import urlopen
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen("http://127.0.0.1:5000/", timeout=1) as r:
+                if r.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def warm_up():
+    """Once the server is answering, import yt-dlp and locate ffmpeg so the first job doesn't pay for it."""
+    try:
+        wait_for_server()
+        started = time.perf_counter()
+        importlib.import_module("yt_dlp")
+        _startup_timings.append(("import yt_dlp (background)", time.perf_counter() - started))
+        _ensure_ffmpeg_bin()
+    except Exception as e:
+        print(f"[!] Background warm-up failed: {e}")
+    finally:
+        _warm_up_done.set()
+
+
+def print_startup_profile(server_started):
+    """--startup-profile: report how long each startup step took once warm-up is done."""
+    ready = wait_for_server()
+    now = time.perf_counter()
+    if ready:
+        _startup_timings.append(("server answering / (after thread start)", now - server_started))
+        _startup_timings.append(("server answering / (since launch)", now - _STARTUP_STARTED))
+    else:
+        print("[!] Startup profile: server did not answer / within 30s")
+    _warm_up_done.wait(timeout=120)
+    print("\n  Startup profile")
+    for label, seconds in list(_startup_timings):
+        print(f"    {seconds * 1000:9.1f} ms  {label}")
+    print("  Per-module import times: python -X importtime tiktokdownload.py --startup-profile")
+    print()
 
-        time.sleep(5)
 
 def start_flask():
     # Run Flask server in a background thread without the reloader
@@ -797,26 +2450,68 @@ def start_tray():
     )
 
     def poll_server_ready():
-        for _ in range(60):  # poll up to ~30 seconds
-            try:
-                r = requests.get("http://127.0.0.1:5000/get_transcription", timeout=1)
-                if r.ok:
-                    icon.icon = make_icon_image(ready=True)
-                    icon.title = f"TikTok Downloader - Ready at http://127.0.0.1:5000 | Save local: {get_save_mode_text()}"
-                    break
-            except Exception:
-                pass
-            time.sleep(0.5)
+        if wait_for_server(timeout=30):
+            icon.icon = make_icon_image(ready=True)
+            icon.title = f"TikTok Downloader - Ready at http://127.0.0.1:5000 | Save local: {get_save_mode_text()}"
 
     Thread(target=poll_server_ready, daemon=True).start()
     icon.run()
 
 
 if __name__ == '__main__':
+    startup_profile = "--startup-profile" in sys.argv[1:]
+    settings_started = time.perf_counter()
     settings = load_app_settings()
+    _startup_timings.append(("load app_settings.json", time.perf_counter() - settings_started))
     persisted_save_mode = settings.get("save_videos_locally")
     if isinstance(persisted_save_mode, bool):
         SAVE_VIDEOS_LOCALLY = persisted_save_mode
+    persisted_word_timestamps = settings.get("word_timestamps")
+    if isinstance(persisted_word_timestamps, bool):
+        WORD_TIMESTAMPS = persisted_word_timestamps
+    persisted_latest_wins = settings.get("latest_wins")
+    if isinstance(persisted_latest_wins, bool):
+        LATEST_WINS = persisted_latest_wins
+    if "--latest-wins" in sys.argv[1:]:
+        LATEST_WINS = True
+    persisted_parallel = settings.get("max_parallel_downloads")
+    if isinstance(persisted_parallel, int) and not isinstance(persisted_parallel, bool):
+        MAX_PARALLEL_DOWNLOADS = persisted_parallel
+    cli_parallel = _parse_cli_int("--parallel")
+    if cli_parallel is not None:
+        MAX_PARALLEL_DOWNLOADS = cli_parallel
+    MAX_PARALLEL_DOWNLOADS = max(1, MAX_PARALLEL_DOWNLOADS)
+    apply_platform_limit_overrides(settings.get("platform_limits"))
+    queue_path = _parse_cli_value("--queue") or settings.get("transcribe_queue")
+    if isinstance(queue_path, str) and queue_path:
+        TRANSCRIBE_QUEUE_DB = Path(queue_path).expanduser().resolve()
+    persisted_remote = settings.get("remote_transcription")
+    if isinstance(persisted_remote, bool):
+        REMOTE_TRANSCRIPTION = persisted_remote
+    if "--remote-transcription" in sys.argv[1:]:
+        REMOTE_TRANSCRIPTION = True
+
+    persisted_models = settings.get("whisper_models")
+    if isinstance(persisted_models, list) and persisted_models and all(isinstance(m, str) for m in persisted_models):
+        WHISPER_MODELS = persisted_models
+    persisted_model = settings.get("whisper_model")
+    if isinstance(persisted_model, str):
+        WHISPER_MODEL = persisted_model
+    persisted_latency = settings.get("target_latency_seconds")
+    if isinstance(persisted_latency, (int, float)) and not isinstance(persisted_latency, bool):
+        TARGET_LATENCY_SECONDS = persisted_latency
+    cli_latency = _parse_cli_int("--target-latency")
+    if cli_latency is not None:
+        TARGET_LATENCY_SECONDS = cli_latency
+
+    if "--worker" in sys.argv[1:]:
+        # Transcription-only process: no server, tray or prompts. Media paths in the queue are
+        # relative to the server's folder; point --media-root at it when running on another machine.
+        try:
+            run_transcription_worker(_parse_cli_value("--media-root") or str(BASE_DIR))
+        except KeyboardInterrupt:
+            print("[+] Transcription worker stopped")
+        sys.exit(0)
 
     cli_transcribe = _parse_cli_args()
     if cli_transcribe is not None:
@@ -826,25 +2521,54 @@ if __name__ == '__main__':
         print(f"  Mode: {'Transcribe' if TRANSCRIBE_ENABLED else 'Download only'}\n")
         print("  Mode: Headless (tray)\n")
 
-    # Re-launch with pythonw on Windows (no console)
-    if _relaunch_headless_without_console(TRANSCRIBE_ENABLED):
+    # Re-launch with pythonw on Windows (no console); keep the console when profiling
+    if not startup_profile and _relaunch_headless_without_console(TRANSCRIBE_ENABLED):
         sys.exit(0)
 
     globals()["TRANSCRIBE_ENABLED"] = TRANSCRIBE_ENABLED
     globals()["SAVE_VIDEOS_LOCALLY"] = SAVE_VIDEOS_LOCALLY
+    globals()["MAX_PARALLEL_DOWNLOADS"] = MAX_PARALLEL_DOWNLOADS
+    globals()["WORD_TIMESTAMPS"] = WORD_TIMESTAMPS
+    globals()["LATEST_WINS"] = LATEST_WINS
+    globals()["REMOTE_TRANSCRIPTION"] = REMOTE_TRANSCRIPTION
+    globals()["TRANSCRIBE_QUEUE_DB"] = TRANSCRIBE_QUEUE_DB
+    globals()["WHISPER_MODELS"] = WHISPER_MODELS
+    globals()["WHISPER_MODEL"] = WHISPER_MODEL
+    globals()["TARGET_LATENCY_SECONDS"] = TARGET_LATENCY_SECONDS
 
     with lock:
         data["save_videos_locally"] = bool(SAVE_VIDEOS_LOCALLY)
 
+    # Restore jobs from before a restart/crash (queues unfinished ones for the workers below)
+    replay_journal()
+    Thread(target=journal_compactor, daemon=True).start()
+    Thread(target=runtime_video_sweeper, daemon=True).start()
+
+    _enable_child_process_tracking()
     if os.name == "nt":
         _enable_no_window_subprocesses()
 
     # Start Flask first so server accepts connections ASAP
+    server_started = time.perf_counter()
     server_thread = Thread(target=start_flask, daemon=True)
     server_thread.start()
 
-    # Start background worker (ffmpeg/whisper load lazily on first URL)
+    # Import yt-dlp and locate ffmpeg once the server is up (whisper still loads on first transcription)
+    Thread(target=warm_up, daemon=True).start()
+    if startup_profile:
+        Thread(target=print_startup_profile, args=(server_started,), daemon=True).start()
+
+    # Start background worker
     worker_thread = Thread(target=worker, daemon=True)
     worker_thread.start()
 
+    # Batch workers for /set_urls (downloads run in parallel, transcriptions one at a time)
+    for _ in range(MAX_PARALLEL_DOWNLOADS):
+        Thread(target=batch_worker, daemon=True).start()
+    print(f"[+] Batch downloads: up to {MAX_PARALLEL_DOWNLOADS} in parallel")
+
+    if TRANSCRIBE_ENABLED and REMOTE_TRANSCRIPTION:
+        Thread(target=collect_transcriptions, daemon=True).start()
+        print(f"[+] Transcription: by --worker processes via {TRANSCRIBE_QUEUE_DB}")
+
     start_tray()